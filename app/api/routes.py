@@ -1,6 +1,6 @@
 """API routes for Aurora Q&A System."""
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from app.models.schemas import QuestionRequest, QuestionResponse, HealthResponse
 from app.services import (
     get_data_fetcher,
@@ -8,17 +8,100 @@ from app.services import (
     get_vector_store,
     get_llm_service,
     get_hybrid_retriever,
+    get_query_cache,
+    get_response_cache,
+    classify_intent,
+    get_canned_answer,
+    normalize,
 )
 from app.core.logging import get_logger
 from app.core.config import get_settings
 from app import __version__
+from typing import Any, Dict
+import asyncio
+import os
+import threading
 import time
 
 logger = get_logger(__name__)
 router = APIRouter()
 
+# Caps concurrent embedding/vector-search work so parallel /ask requests
+# don't oversubscribe the CPU. Acquired inside the worker thread, so it is
+# not tied to any event loop.
+_embedding_slots = threading.BoundedSemaphore(os.cpu_count() or 1)
 
-@router.post("/ask", response_model=QuestionResponse)
+
+# Set once the services /ask depends on are initialized
+_services_ready = False
+
+
+async def services_ready() -> None:
+    """
+    Dependency guaranteeing the /ask services are initialized.
+    
+    Initialization normally happens in the app lifespan; this checks (and
+    lazily completes) it once, after which it is a single flag read. The
+    embedding model is excluded because it loads on first use, which also
+    retries a failed background warmup (see app.main.lifespan).
+    
+    Raises:
+        HTTPException: 503 if the services cannot be initialized
+    """
+    global _services_ready
+    if _services_ready:
+        return
+    
+    try:
+        vector_store = get_vector_store()
+        if not vector_store.is_initialized:
+            vector_store.initialize()
+        llm_service = get_llm_service()
+        if not llm_service.is_initialized:
+            llm_service.initialize()
+    except Exception as e:
+        logger.error("services_not_ready", error=str(e))
+        raise HTTPException(
+            status_code=503,
+            detail=f"Service not ready: {str(e)}"
+        )
+    
+    _services_ready = True
+
+
+def _semantic_search(question: str, cache_key: str) -> Dict[str, Any]:
+    """
+    Embed the question and search the vector store, reusing cached results.
+    
+    Blocking (model inference + ChromaDB query); run it on a worker thread.
+    
+    Args:
+        question: User question
+        cache_key: Normalized question used as the cache key
+        
+    Returns:
+        Vector store results (ids, documents, metadatas, distances)
+    """
+    query_cache = get_query_cache()
+    
+    cached = query_cache.get(cache_key)
+    if cached is not None:
+        return cached[1]
+    
+    with _embedding_slots:
+        question_embedding = get_embedding_service().generate_embedding(question)
+        semantic_results = query_cache.get_similar(question_embedding)
+        if semantic_results is None:
+            semantic_results = get_vector_store().search(
+                query_embedding=question_embedding,
+                top_k=get_settings().dense_top_k  # Candidates for reranking
+            )
+    query_cache.put(cache_key, question_embedding, semantic_results)
+    
+    return semantic_results
+
+
+@router.post("/ask", response_model=QuestionResponse, dependencies=[Depends(services_ready)])
 async def ask_question(request: QuestionRequest) -> QuestionResponse:
     """
     Answer a natural language question about member data.
@@ -34,47 +117,75 @@ async def ask_question(request: QuestionRequest) -> QuestionResponse:
     logger.info("question_received", question=request.question)
     
     try:
-        # Get services
-        embedder = get_embedding_service()
-        vector_store = get_vector_store()
+        response_cache = get_response_cache()
+        
+        # Normalize once: the key feeds both caches, the tokens feed BM25
+        cache_key, query_tokens = normalize(request.question)
+        
+        # Exact repeat: serve the previous answer
+        cached_response = response_cache.get(cache_key)
+        if cached_response is not None:
+            logger.info("response_cache_hit", question=request.question)
+            return cached_response.model_copy(update={
+                "processing_time_ms": round((time.time() - start_time) * 1000, 2)
+            })
+        
+        # Small talk / questions about the assistant need no retrieval
+        intent = classify_intent(request.question)
+        canned_answer = get_canned_answer(intent)
+        if canned_answer is not None:
+            logger.info("question_short_circuited", intent=intent)
+            return QuestionResponse(
+                answer=canned_answer,
+                confidence="low",  # Nothing was retrieved to back the answer
+                sources=[],
+                retrieved_contexts=0,
+                processing_time_ms=round((time.time() - start_time) * 1000, 2)
+            )
+        
+        # Get services (initialization is guaranteed by services_ready)
         llm_service = get_llm_service()
         hybrid_retriever = get_hybrid_retriever()
         settings = get_settings()
         
-        # Ensure everything is initialized
-        if not embedder.is_loaded:
-            embedder.load_model()
-        if not vector_store.is_initialized:
-            vector_store.initialize()
-        if not llm_service.is_initialized:
-            llm_service.initialize()
-        
-        # Generate embedding for the question
-        question_embedding = embedder.generate_embedding(request.question)
-        
         # HYBRID SEARCH: Combine semantic (dense) + BM25 (sparse)
-        # Step 1: Get semantic search results (top-50 for reranking)
-        semantic_results = vector_store.search(
-            query_embedding=question_embedding,
-            top_k=50  # Get more candidates for reranking
+        # The two searches are independent, so run them concurrently:
+        # Step 1a: semantic search (dense_top_k candidates for reranking)
+        # Step 1b: BM25 with query expansion (bm25_top_k candidates)
+        semantic_results, (bm25_ids, bm25_scores) = await asyncio.gather(
+            asyncio.to_thread(_semantic_search, request.question, cache_key),
+            asyncio.to_thread(
+                hybrid_retriever.search_bm25_topk,
+                request.question,
+                top_k=settings.bm25_top_k,
+                tokens=query_tokens
+            ),
         )
         
         # Convert to format needed for hybrid search
         semantic_results_list = [
             {
-                'id': semantic_results['ids'][i],
-                'document': semantic_results['documents'][i],
-                'user_name': semantic_results['metadatas'][i]['user_name'],
-                'timestamp': semantic_results['metadatas'][i]['timestamp'],
-                'distance': semantic_results['distances'][i]
+                'id': sid,
+                'document': document,
+                'user_name': metadata['user_name'],
+                'timestamp': metadata['timestamp'],
+                'distance': distance
             }
-            for i in range(len(semantic_results['ids']))
+            for sid, document, metadata, distance in zip(
+                semantic_results['ids'],
+                semantic_results['documents'],
+                semantic_results['metadatas'],
+                semantic_results['distances']
+            )
         ]
+        meta_by_id = dict(zip(semantic_results['ids'], semantic_results['metadatas']))
         
-        # Step 2: Combine with BM25 (top 100) and rerank to top 25
-        search_results_hybrid = hybrid_retriever.hybrid_search(
-            query=request.question,
+        # Step 2: Fuse with BM25 via Reciprocal Rank Fusion, keep top 25
+        search_results_hybrid = hybrid_retriever.fuse_rrf(
             semantic_results=semantic_results_list,
+            bm25_ids=bm25_ids,
+            bm25_scores=bm25_scores,
+            semantic_weight=0.4,
             bm25_weight=0.6,  # Favor BM25 slightly for keyword matching
             top_k=25  # Final number of contexts for LLM
         )
@@ -82,14 +193,8 @@ async def ask_question(request: QuestionRequest) -> QuestionResponse:
         # Build context messages for LLM from hybrid results
         context_messages = []
         for result in search_results_hybrid:
-            # Try to get metadata from semantic results
-            metadata = None
-            for sem_res in semantic_results_list:
-                if sem_res.get('id') == result.get('id'):
-                    # Get metadata from vector store results
-                    idx = semantic_results['ids'].index(sem_res['id'])
-                    metadata = semantic_results['metadatas'][idx]
-                    break
+            # Metadata (original message) is only available for semantic hits
+            metadata = meta_by_id.get(result['id'])
             
             context_messages.append({
                 'document': result['document'],
@@ -101,8 +206,8 @@ async def ask_question(request: QuestionRequest) -> QuestionResponse:
             })
 
         
-        # Generate answer using LLM
-        result = llm_service.generate_answer(
+        # Generate answer using LLM (async client, no thread tied up on the round-trip)
+        result = await llm_service.agenerate_answer(
             question=request.question,
             context_messages=context_messages
         )
@@ -117,13 +222,16 @@ async def ask_question(request: QuestionRequest) -> QuestionResponse:
             processing_time_ms=processing_time
         )
         
-        return QuestionResponse(
+        response = QuestionResponse(
             answer=result['answer'],
             confidence=result['confidence'],
             sources=result['sources'],
             retrieved_contexts=len(context_messages),
             processing_time_ms=round(processing_time, 2)
         )
+        response_cache.put(cache_key, response)
+        
+        return response
         
     except Exception as e:
         logger.error("error_answering_question", error=str(e), question=request.question)
@@ -183,14 +291,18 @@ async def refresh_data():
             embedder.load_model()
         
         texts = [msg.message for msg in messages]
-        embeddings = embedder.generate_embeddings_batch(texts)
+        embeddings = await asyncio.to_thread(embedder.generate_embeddings_batch, texts)
         
         # Reindex in vector store
         vector_store = get_vector_store()
         if not vector_store.is_initialized:
             vector_store.initialize()
         
-        vector_store.index_messages(messages, embeddings)
+        await asyncio.to_thread(vector_store.index_messages, messages, embeddings)
+        
+        # Cached search results and answers may reference the old index
+        get_query_cache().clear()
+        get_response_cache().clear()
         
         logger.info("refresh_completed", count=len(messages))
         
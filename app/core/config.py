@@ -15,14 +15,22 @@ class Settings(BaseSettings):
     
     # Model Configuration
     embedding_model: str = "sentence-transformers/all-MiniLM-L6-v2"
+    embedding_quantized: bool = True  # int8 ONNX weights (needs optimum for the one-off export)
+    embedding_cache_dir: str = "./data/models"
+    embedding_max_tokens_per_batch: int = 8192  # Padded tokens per forward pass when batch embedding
+    embedding_workers: int = 0  # Concurrent batch-embedding threads (0 = min(cpus // 2, 4))
     llm_model: str = "llama-3.3-70b-versatile"  # Fast and accurate for RAG
     
     # ChromaDB
     chromadb_path: str = "./data/chromadb"
     collection_name: str = "member_messages"
+    chromadb_memory_limit_bytes: int = 1024 * 1024 * 1024  # LRU budget for loaded segments
     
     # Cache
+    bm25_cache_dir: str = "./data/bm25"  # Persisted BM25 index; empty disables
     cache_ttl_seconds: int = 3600
+    query_cache_size: int = 10000
+    query_cache_similarity: float = 0.97  # Cosine threshold for reusing a near-duplicate query
     
     # Server
     host: str = "0.0.0.0"
@@ -30,6 +38,8 @@ class Settings(BaseSettings):
     
     # Retrieval
     top_k_results: int = 15
+    dense_top_k: int = 20  # Vector search candidates fed into fusion
+    bm25_top_k: int = 50  # BM25 candidates fed into fusion
     
     # LLM
     llm_temperature: float = 0.3  # Slightly higher for more creative synthesis
@@ -1,8 +1,10 @@
 """Main FastAPI application for Aurora Q&A System."""
 
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 from app.api import router
 from app.core import setup_logging, get_logger, get_settings
 from app.services import (
@@ -12,6 +14,7 @@ from app.services import (
     get_llm_service,
     get_hybrid_retriever,
 )
+from app.utils.backup import load_messages_backup, save_messages_backup
 from app import __version__
 
 # Setup logging
@@ -19,6 +22,17 @@ setup_logging()
 logger = get_logger(__name__)
 
 
+def _log_warmup_result(task: asyncio.Task) -> None:
+    """Retrieve and log the background embedder warmup's failure, if any."""
+    if task.cancelled():
+        return
+    error = task.exception()
+    if error is not None:
+        logger.error("embedder_warmup_failed", error=str(error))
+    else:
+        logger.info("embedder_warmup_complete")
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
@@ -36,10 +50,6 @@ async def lifespan(app: FastAPI):
         llm_service = get_llm_service()
         hybrid_retriever = get_hybrid_retriever()
         
-        # Initialize embedding model
-        logger.info("loading_embedding_model")
-        embedder.load_model()
-        
         # Initialize vector store
         logger.info("initializing_vector_store")
         vector_store.initialize()
@@ -53,6 +63,15 @@ async def lifespan(app: FastAPI):
         
         if existing_count > 0:
             logger.info("using_existing_chromadb_index", count=existing_count)
+            
+            # The index is already embedded, so the model is only needed for
+            # queries: warm it in the background instead of blocking startup
+            # (the first /ask waits on the same load lock if it gets there first).
+            # Kept on app.state so /ask can see a failed load and shutdown can cancel it.
+            logger.info("loading_embedding_model_in_background")
+            app.state.embedder_warmup = asyncio.create_task(asyncio.to_thread(embedder.load_model))
+            app.state.embedder_warmup.add_done_callback(_log_warmup_result)
+            
             # Skip API fetch if we already have data
             messages = None
             
@@ -65,32 +84,18 @@ async def lifespan(app: FastAPI):
                     logger.info("bm25_indexed_from_api")
                 except Exception as e:
                     logger.warning("api_unavailable_loading_from_backup", error=str(e))
-                    # Load from backup JSON
-                    import json
-                    from pathlib import Path
-                    from app.models.schemas import Message
-                    from datetime import datetime
-                    
-                    backup_path = Path("./data/messages_backup.json")
-                    if backup_path.exists():
-                        with open(backup_path, 'r') as f:
-                            messages_data = json.load(f)
-                        messages = [
-                            Message(
-                                id=m['id'],
-                                user_id=m['user_id'],
-                                user_name=m['user_name'],
-                                timestamp=datetime.fromisoformat(m['timestamp']),
-                                message=m['message']
-                            )
-                            for m in messages_data
-                        ]
+                    # Load from backup (Parquet, or the legacy JSON file)
+                    messages = load_messages_backup()
+                    if messages is not None:
                         hybrid_retriever.index_messages(messages)
                         logger.info("bm25_indexed_from_backup", count=len(messages))
                     else:
                         logger.warning("no_backup_file_found_bm25_disabled")
         else:
-            # No existing data, must fetch from API
+            # No existing data, must fetch from API and embed the corpus
+            logger.info("loading_embedding_model")
+            embedder.load_model()
+            
             logger.info("fetching_initial_data")
             messages = await data_fetcher.fetch_all_messages()
             
@@ -107,21 +112,7 @@ async def lifespan(app: FastAPI):
             hybrid_retriever.index_messages(messages)
             
             # Save backup
-            import json
-            from pathlib import Path
-            backup_data = [
-                {
-                    'id': msg.id,
-                    'user_id': msg.user_id,
-                    'user_name': msg.user_name,
-                    'timestamp': msg.timestamp.isoformat(),
-                    'message': msg.message
-                }
-                for msg in messages
-            ]
-            Path("./data").mkdir(exist_ok=True)
-            with open("./data/messages_backup.json", 'w') as f:
-                json.dump(backup_data, f, indent=2)
+            save_messages_backup(messages)
             
             logger.info("indexing_complete_and_backup_saved")
         
@@ -131,6 +122,12 @@ async def lifespan(app: FastAPI):
         
         # Shutdown
         logger.info("application_shutting_down")
+        embedder_warmup = getattr(app.state, "embedder_warmup", None)
+        if embedder_warmup is not None and not embedder_warmup.done():
+            embedder_warmup.cancel()
+            await asyncio.gather(embedder_warmup, return_exceptions=True)
+        await data_fetcher.aclose()
+        await llm_service.aclose()
         
     except Exception as e:
         logger.error("application_startup_failed", error=str(e))
@@ -143,6 +140,7 @@ app = FastAPI(
     description="Natural language question answering for member data using RAG",
     version=__version__,
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Configure CORS
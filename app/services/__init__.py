@@ -5,6 +5,14 @@ from app.services.embedder import EmbeddingService, get_embedding_service
 from app.services.vector_store import VectorStore, get_vector_store
 from app.services.llm_service import LLMService, get_llm_service
 from app.services.hybrid_retrieval import HybridRetriever, get_hybrid_retriever
+from app.services.query_cache import (
+    QueryCache,
+    ResponseCache,
+    get_query_cache,
+    get_response_cache,
+)
+from app.services.intent import classify_intent, get_canned_answer
+from app.services.text_norm import normalize
 
 __all__ = [
     "DataFetcher",
@@ -17,5 +25,12 @@ __all__ = [
     "get_llm_service",
     "HybridRetriever",
     "get_hybrid_retriever",
+    "QueryCache",
+    "get_query_cache",
+    "ResponseCache",
+    "get_response_cache",
+    "classify_intent",
+    "get_canned_answer",
+    "normalize",
 ]
 
@@ -1,5 +1,6 @@
 """Service to fetch member messages from external API."""
 
+import asyncio
 import httpx
 from typing import List, Optional
 from datetime import datetime, timedelta
@@ -17,7 +18,11 @@ class DataFetcher:
         self.settings = get_settings()
         self._cache: Optional[List[Message]] = None
         self._cache_time: Optional[datetime] = None
-        
+        # Shared client: keeps the TLS connection alive across refreshes.
+        # Its pool belongs to the loop it was opened on (see _get_client).
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+    
     async def fetch_all_messages(self, force_refresh: bool = False) -> List[Message]:
         """
         Fetch all messages from the API with caching.
@@ -36,28 +41,27 @@ class DataFetcher:
         logger.info("fetching_messages_from_api", url=self.settings.messages_api_url)
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                # Fetch with high limit to get all messages
-                response = await client.get(
-                    self.settings.messages_api_url,
-                    params={"limit": 10000}
-                )
-                response.raise_for_status()
-                
-                data = response.json()
-                messages_response = MessagesResponse(**data)
-                
-                self._cache = messages_response.items
-                self._cache_time = datetime.now()
-                
-                logger.info(
-                    "messages_fetched_successfully",
-                    total=messages_response.total,
-                    fetched=len(messages_response.items)
-                )
-                
-                return self._cache
-                
+            # Fetch with high limit to get all messages
+            response = await self._get_client().get(
+                self.settings.messages_api_url,
+                params={"limit": 10000}
+            )
+            response.raise_for_status()
+            
+            # Parse and validate the raw bytes in one pass (pydantic-core)
+            messages_response = MessagesResponse.model_validate_json(response.content)
+            
+            self._cache = messages_response.items
+            self._cache_time = datetime.now()
+            
+            logger.info(
+                "messages_fetched_successfully",
+                total=messages_response.total,
+                fetched=len(messages_response.items)
+            )
+            
+            return self._cache
+            
         except httpx.HTTPError as e:
             logger.error("failed_to_fetch_messages", error=str(e))
             raise Exception(f"Failed to fetch messages: {str(e)}")
@@ -75,6 +79,30 @@ class DataFetcher:
     def get_cached_messages(self) -> Optional[List[Message]]:
         """Get cached messages without fetching."""
         return self._cache
+    
+    def _get_client(self) -> httpx.AsyncClient:
+        """
+        Get the HTTP client for the running event loop.
+        
+        Opened lazily on first use; pooled connections can't be reused from
+        another loop, so a new client is opened if the loop changes.
+        """
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                http2=True,
+                timeout=30.0,
+                limits=httpx.Limits(max_keepalive_connections=10)
+            )
+            self._client_loop = loop
+        return self._client
+    
+    async def aclose(self) -> None:
+        """Close the underlying HTTP client if it belongs to the running event loop."""
+        if self._client is not None and self._client_loop is asyncio.get_running_loop():
+            await self._client.aclose()
+        self._client = None
+        self._client_loop = None
 
 
 # Global singleton instance
@@ -1,7 +1,12 @@
-"""Embedding service using Sentence-Transformers."""
+"""Embedding service using FastEmbed (ONNX Runtime)."""
 
-from sentence_transformers import SentenceTransformer
+from fastembed import TextEmbedding
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import List, Optional
+import os
+import tempfile
+import threading
 import numpy as np
 from app.core.logging import get_logger
 from app.core.config import get_settings
@@ -14,10 +19,17 @@ class EmbeddingService:
     
     def __init__(self):
         self.settings = get_settings()
-        self._model: Optional[SentenceTransformer] = None
+        self._model: Optional[TextEmbedding] = None
+        self._dim: Optional[int] = None
+        self._load_lock = threading.Lock()
     
     def load_model(self) -> None:
-        """Load the embedding model into memory."""
+        """Load the embedding model into memory (thread-safe, loads once)."""
+        with self._load_lock:
+            self._load_model()
+    
+    def _load_model(self) -> None:
+        """Load the model; caller must hold the load lock."""
         if self._model is not None:
             logger.info("embedding_model_already_loaded")
             return
@@ -25,13 +37,74 @@ class EmbeddingService:
         logger.info("loading_embedding_model", model=self.settings.embedding_model)
         
         try:
-            self._model = SentenceTransformer(self.settings.embedding_model)
-            logger.info("embedding_model_loaded_successfully")
+            # FastEmbed serves the same MiniLM weights as an ONNX graph
+            # (ORT_ENABLE_ALL graph optimizations), so no torch at runtime
+            model_kwargs = {}
+            if self.settings.embedding_quantized:
+                quantized_path = self._quantized_model_path()
+                if quantized_path is not None:
+                    model_kwargs["specific_model_path"] = quantized_path
+            
+            # Split the cores between the concurrent batch workers so
+            # parallel ONNX runs don't oversubscribe the CPU
+            self._model = TextEmbedding(
+                model_name=self.settings.embedding_model,
+                threads=max(1, (os.cpu_count() or 1) // self._num_workers()),
+                providers=["CPUExecutionProvider"],
+                **model_kwargs
+            )
+            logger.info("embedding_model_loaded_successfully", quantized=bool(model_kwargs))
         except Exception as e:
             logger.error("failed_to_load_embedding_model", error=str(e))
             raise
     
-    def generate_embedding(self, text: str) -> List[float]:
+    def _quantized_model_path(self) -> Optional[str]:
+        """
+        Get (exporting on first use) an int8 ONNX copy of the embedding model.
+        
+        The model is exported and dynamically quantized with optimum (VNNI
+        int8 MatMuls) into embedding_cache_dir, laid out like FastEmbed's own
+        download so tokenization, pooling and normalization are unchanged.
+        
+        Returns:
+            Model directory, or None to fall back to FP32 weights
+        """
+        model_name = self.settings.embedding_model
+        target = Path(self.settings.embedding_cache_dir) / f"{model_name.replace('/', '__')}-int8"
+        if (target / "model.onnx").exists():
+            return str(target)
+        
+        try:
+            from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+            from optimum.onnxruntime.configuration import AutoQuantizationConfig
+            from transformers import AutoTokenizer
+        except ImportError:
+            logger.warning("optimum_not_installed_using_fp32_embeddings")
+            return None
+        
+        logger.info("quantizing_embedding_model", model=model_name, path=str(target))
+        
+        try:
+            with tempfile.TemporaryDirectory() as export_dir:
+                model = ORTModelForFeatureExtraction.from_pretrained(model_name, export=True)
+                model.save_pretrained(export_dir)
+                
+                quantizer = ORTQuantizer.from_pretrained(export_dir)
+                quantizer.quantize(
+                    save_dir=target,
+                    quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False)
+                )
+                model.config.save_pretrained(target)
+            
+            AutoTokenizer.from_pretrained(model_name).save_pretrained(target)
+            (target / "model_quantized.onnx").replace(target / "model.onnx")
+        except Exception as e:
+            logger.warning("embedding_quantization_failed_using_fp32", error=str(e))
+            return None
+        
+        return str(target)
+    
+    def generate_embedding(self, text: str) -> np.ndarray:
         """
         Generate embedding for a single text.
         
@@ -39,15 +112,15 @@ class EmbeddingService:
             text: Input text
             
         Returns:
-            Embedding vector as list of floats
+            Embedding vector as a contiguous float32 array
         """
         if self._model is None:
             self.load_model()
         
-        embedding = self._model.encode(text, convert_to_numpy=True)
-        return embedding.tolist()
+        embedding = next(iter(self._model.embed([text])))
+        return np.ascontiguousarray(embedding, dtype=np.float32)
     
-    def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
+    def generate_embeddings_batch(self, texts: List[str]) -> np.ndarray:
         """
         Generate embeddings for multiple texts in batch.
         
@@ -55,21 +128,104 @@ class EmbeddingService:
             texts: List of input texts
             
         Returns:
-            List of embedding vectors
+            2D float32 array of embeddings (one row per text)
         """
         if self._model is None:
             self.load_model()
         
+        if not texts:
+            return np.empty((0, self.embedding_dim), dtype=np.float32)
+        
         logger.info("generating_embeddings_batch", count=len(texts))
         
-        embeddings = self._model.encode(
-            texts,
-            convert_to_numpy=True,
-            show_progress_bar=True,
-            batch_size=32
+        # Sort by token length and pack batches up to a padded-token budget,
+        # so short messages are embedded many at a time and long ones don't
+        # pad a whole batch. Results are scattered back to the caller's order.
+        # FastEmbed already L2-normalizes MiniLM outputs inside each call.
+        lengths = self._token_lengths(texts)
+        order = sorted(range(len(texts)), key=lengths.__getitem__)
+        batches = self._pack_batches(order, lengths, self.settings.embedding_max_tokens_per_batch)
+        
+        # Batches are independent: run them on a few worker threads sharing
+        # the ONNX session (ORT releases the GIL during inference)
+        batch_texts = [[texts[i] for i in batch] for batch in batches]
+        workers = min(self._num_workers(), len(batches))
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                batch_embeddings = list(pool.map(self._embed_batch, batch_texts))
+        else:
+            batch_embeddings = [self._embed_batch(chunk) for chunk in batch_texts]
+        
+        self._dim = batch_embeddings[0].shape[1]
+        embeddings = np.empty((len(texts), self._dim), dtype=np.float32)
+        for batch, batch_embedding in zip(batches, batch_embeddings):
+            embeddings[batch] = batch_embedding
+        
+        logger.info(
+            "embeddings_batch_complete",
+            count=len(texts),
+            forward_passes=len(batches),
+            workers=workers
+        )
+        
+        return embeddings
+    
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        """Embed one packed batch in a single forward pass."""
+        return np.asarray(
+            list(self._model.embed(texts, batch_size=len(texts))),
+            dtype=np.float32
         )
+    
+    def _num_workers(self) -> int:
+        """Number of concurrent batch workers (0 in settings = auto)."""
+        if self.settings.embedding_workers > 0:
+            return self.settings.embedding_workers
+        return max(1, min((os.cpu_count() or 1) // 2, 4))
+    
+    def _token_lengths(self, texts: List[str]) -> List[int]:
+        """Count (truncated) tokens per text with the model's own tokenizer."""
+        tokenizer = getattr(getattr(self._model, "model", None), "tokenizer", None)
+        if tokenizer is None:
+            # Rough estimate if the backend doesn't expose its tokenizer
+            return [len(text.split()) + 2 for text in texts]
+        
+        # Padding is enabled on FastEmbed's tokenizer, so count real tokens
+        return [sum(encoding.attention_mask) for encoding in tokenizer.encode_batch(texts)]
+    
+    @staticmethod
+    def _pack_batches(order: List[int], lengths: List[int], max_tokens: int) -> List[List[int]]:
+        """
+        Greedily pack length-sorted indices into batches within a token budget.
+        
+        A batch is padded to its longest text, so its cost is
+        len(batch) * longest; since order is ascending that is the last item.
         
-        return embeddings.tolist()
+        Args:
+            order: Text indices sorted by ascending token length
+            lengths: Token length per text
+            max_tokens: Padded-token budget per forward pass
+            
+        Returns:
+            List of batches (lists of text indices)
+        """
+        batches: List[List[int]] = []
+        batch: List[int] = []
+        for i in order:
+            if batch and (len(batch) + 1) * lengths[i] > max_tokens:
+                batches.append(batch)
+                batch = []
+            batch.append(i)
+        if batch:
+            batches.append(batch)
+        return batches
+    
+    @property
+    def embedding_dim(self) -> int:
+        """Embedding dimension of the loaded model (probed once)."""
+        if self._dim is None:
+            self._dim = self.generate_embedding("").shape[0]
+        return self._dim
     
     @property
     def is_loaded(self) -> bool:
@@ -87,4 +243,3 @@ def get_embedding_service() -> EmbeddingService:
     if _embedding_service is None:
         _embedding_service = EmbeddingService()
     return _embedding_service
-
@@ -1,15 +1,28 @@
 """Hybrid retrieval combining BM25 (sparse) and semantic (dense) search with query expansion."""
 
-from typing import List, Dict, Any
-from rank_bm25 import BM25Okapi
+from typing import List, Dict, Any, Literal, Optional, Sequence, Tuple
+from collections import defaultdict
+from pathlib import Path
+from operator import itemgetter
+import hashlib
+import heapq
+import re
+import sys
 import numpy as np
+from scipy import sparse
 from app.models.schemas import Message
 from app.core.logging import get_logger
+from app.core.config import get_settings
+
+try:
+    from numba import njit
+except ImportError:  # Optional: scipy's column product is used instead
+    njit = None
 
 logger = get_logger(__name__)
 
-# Query expansion synonyms for common terms
-QUERY_EXPANSIONS = {
+# Query expansion synonyms for common terms (frozensets: expansion is a set union)
+QUERY_EXPANSIONS = {k: frozenset(v) for k, v in {
     'trip': ['trip', 'travel', 'journey', 'visit', 'stay'],
     'planning': ['planning', 'scheduled', 'booking', 'arranging', 'organizing'],
     'when': ['when', 'date', 'time', 'schedule'],
@@ -17,16 +30,46 @@ QUERY_EXPANSIONS = {
     'restaurant': ['restaurant', 'dining', 'eatery', 'cuisine'],
     'car': ['car', 'vehicle', 'automobile', 'transportation'],
     'have': ['have', 'own', 'possess'],
-}
+}.items()}
+_EXPANDABLE_KEYS = frozenset(QUERY_EXPANSIONS)
+
+# Runs of punctuation, replaced by a single space before splitting
+_TOKEN_RE = re.compile(r'[^\w\s]+', re.UNICODE)
+
+# Reciprocal Rank Fusion smoothing constant (standard value from the RRF paper)
+RRF_K = 60
+
+# Okapi BM25 parameters (rank_bm25's BM25Okapi defaults): term-frequency
+# saturation, length normalization, and the floor for negative idfs as a
+# fraction of the average idf
+BM25_K1 = 1.5
+BM25_B = 0.75
+BM25_EPSILON = 0.25
+
+
+if njit is not None:
+    @njit(cache=True, fastmath=True)
+    def _bm25_scan(indptr, indices, data, term_cols, term_counts, out):
+        """Accumulate the query terms' CSC columns into out (one score per document)."""
+        for t in range(term_cols.size):
+            col = term_cols[t]
+            count = term_counts[t]
+            for j in range(indptr[col], indptr[col + 1]):
+                out[indices[j]] += data[j] * count
+else:
+    _bm25_scan = None
 
 
 class HybridRetriever:
     """Combines BM25 keyword search with semantic vector search."""
     
     def __init__(self):
-        self._bm25: BM25Okapi = None
+        self.settings = get_settings()
         self._messages: List[Message] = None
-        self._tokenized_corpus: List[List[str]] = None
+        self._bm25_matrix: Optional[sparse.csc_matrix] = None
+        self._vocab: Dict[str, int] = {}
+        self._ids: np.ndarray = np.empty(0, dtype=object)
+        self._message_by_id: Dict[str, Message] = {}
     
     def index_messages(self, messages: List[Message]) -> None:
         """
@@ -39,19 +82,38 @@ class HybridRetriever:
         logger.info("indexing_bm25", count=len(messages))
         
         self._messages = messages
+        # Row -> id array (for vectorized top-k id selection) and id -> message map
+        # (for materializing only the results that survive fusion)
+        self._ids = np.array([msg.id for msg in messages], dtype=object)
+        self._message_by_id = {msg.id: msg for msg in messages}
         
-        # Tokenize corpus: INCLUDE USER NAME for better matching!
-        # This way "Layla" in query will match messages from Layla
-        self._tokenized_corpus = [
-            self._tokenize(f"{msg.user_name} {msg.message}") for msg in messages
-        ]
-        
-        # Create BM25 index
-        self._bm25 = BM25Okapi(self._tokenized_corpus)
+        # The term-weight matrix is persisted per corpus, so restarts skip
+        # tokenizing and rebuilding the BM25 statistics
+        cache_path = self._index_cache_path(messages)
+        if not self._load_index(cache_path):
+            # Tokenize corpus: INCLUDE USER NAME for better matching!
+            # This way "Layla" in query will match messages from Layla
+            # Each distinct user name is tokenized once, then prepended per message
+            name_tokens = {
+                name: self._tokenize(name) for name in {msg.user_name for msg in messages}
+            }
+            tokenized_corpus = [
+                name_tokens[msg.user_name] + self._tokenize(msg.message) for msg in messages
+            ]
+            
+            # Create BM25 index
+            self._build_bm25_matrix(tokenized_corpus)
+            self._save_index(cache_path)
         
         logger.info("bm25_indexing_complete", count=len(messages))
     
-    def search_bm25(self, query: str, top_k: int = 100, use_expansion: bool = True) -> List[Dict[str, Any]]:
+    def search_bm25(
+        self,
+        query: str,
+        top_k: int = 100,
+        use_expansion: bool = True,
+        tokens: Optional[Sequence[str]] = None
+    ) -> List[Dict[str, Any]]:
         """
         Perform BM25 keyword search with optional query expansion.
         
@@ -59,142 +121,340 @@ class HybridRetriever:
             query: Search query
             top_k: Number of results to return
             use_expansion: Whether to expand query with synonyms
+            tokens: Pre-tokenized query (e.g. from text_norm.normalize); skips tokenization
             
         Returns:
             List of results with message data and BM25 scores
         """
-        if self._bm25 is None:
+        return self._materialize(*self.search_bm25_topk(query, top_k, use_expansion, tokens))
+    
+    def search_bm25_topk(
+        self,
+        query: str,
+        top_k: int = 100,
+        use_expansion: bool = True,
+        tokens: Optional[Sequence[str]] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        BM25 search returning parallel arrays instead of result dicts.
+        
+        The fusion step only needs ids and scores, so callers that fuse
+        (hybrid_search, /ask) skip building a dict per hit and materialize
+        just the fused survivors.
+        
+        Args:
+            query: Search query
+            top_k: Number of results to return
+            use_expansion: Whether to expand query with synonyms
+            tokens: Pre-tokenized query (e.g. from text_norm.normalize); skips tokenization
+            
+        Returns:
+            (ids, scores): object array of message ids and float32 BM25 scores,
+            best first, non-zero scores only
+        """
+        if self._bm25_matrix is None:
+            logger.error("bm25_not_initialized")
+            return self._top_k(np.empty(0, dtype=np.float32), top_k)
+        
+        tokenized_query = self._query_tokens(query, use_expansion, tokens)
+        
+        # Get BM25 scores for all documents
+        scores = self._bm25_scores(tokenized_query)
+        
+        ids, top_scores = self._top_k(scores, top_k)
+        
+        logger.info("bm25_search_complete", results_count=len(ids))
+        return ids, top_scores
+    
+    def search_bm25_batch(
+        self,
+        queries: List[str],
+        top_k: int = 100,
+        use_expansion: bool = True
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        BM25 search for several queries at once.
+        
+        All queries are scored in one sparse matrix product against the
+        precomputed term weights (docs x vocab @ vocab x queries) instead of
+        one pass per query.
+        
+        Args:
+            queries: Search queries
+            top_k: Number of results to return per query
+            use_expansion: Whether to expand queries with synonyms
+            
+        Returns:
+            One result list (as returned by search_bm25) per query
+        """
+        if self._bm25_matrix is None:
             logger.error("bm25_not_initialized")
-            return []
+            return [[] for _ in queries]
+        
+        if len(queries) == 1:
+            return [self.search_bm25(q, top_k=top_k, use_expansion=use_expansion) for q in queries]
+        
+        # Sparse (queries x vocab) matrix of query term counts
+        rows: List[int] = []
+        cols: List[int] = []
+        counts: List[float] = []
+        for row, query in enumerate(queries):
+            term_counts = self._query_term_counts(self._query_tokens(query, use_expansion))
+            rows.extend([row] * len(term_counts))
+            cols.extend(term_counts.keys())
+            counts.extend(term_counts.values())
+        query_matrix = sparse.csr_matrix(
+            (np.asarray(counts, dtype=np.float32), (rows, cols)),
+            shape=(len(queries), len(self._vocab))
+        )
+        
+        # (docs x queries) -> one contiguous score row per query
+        scores = np.ascontiguousarray((self._bm25_matrix @ query_matrix.T).toarray().T)
+        results = [self._materialize(*self._top_k(query_scores, top_k)) for query_scores in scores]
         
+        logger.info("bm25_batch_search_complete", queries=len(queries))
+        return results
+    
+    def _query_tokens(
+        self,
+        query: str,
+        use_expansion: bool,
+        tokens: Optional[Sequence[str]] = None
+    ) -> List[str]:
+        """Tokenize a query (unless pre-tokenized) and apply synonym expansion."""
         # Tokenize query
-        tokenized_query = self._tokenize(query)
+        tokenized_query = list(tokens) if tokens is not None else self._tokenize(query)
         
         # QUERY EXPANSION: Add synonyms for better matching
         if use_expansion:
-            expanded_tokens = []
-            for token in tokenized_query:
-                expanded_tokens.append(token)
-                if token in QUERY_EXPANSIONS:
-                    # Add synonyms
-                    expanded_tokens.extend(QUERY_EXPANSIONS[token])
-            tokenized_query = list(set(expanded_tokens))  # Remove duplicates
-            logger.info("query_expanded", original_tokens=len(tokenized_query), expanded_tokens=len(expanded_tokens))
+            expandable = _EXPANDABLE_KEYS.intersection(tokenized_query)
+            expanded = set(tokenized_query)  # Remove duplicates
+            for token in expandable:
+                # Add synonyms
+                expanded.update(QUERY_EXPANSIONS[token])
+            logger.info("query_expanded", original_tokens=len(tokenized_query), expanded_tokens=len(expanded))
+            tokenized_query = list(expanded)
         
-        # Get BM25 scores for all documents
-        scores = self._bm25.get_scores(tokenized_query)
+        return tokenized_query
+    
+    def _top_k(self, scores: np.ndarray, top_k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Select the top-k non-zero scores as (ids, scores) arrays, best first."""
+        # Nothing matched (only non-zero scores are returned): skip selection
+        k = min(top_k, scores.size)
+        if k == 0 or scores.max() <= 0:
+            return np.empty(0, dtype=object), np.empty(0, dtype=np.float32)
         
-        # Get top-k indices
-        top_indices = np.argsort(scores)[::-1][:top_k]
+        # Get top-k indices: O(N) partition, then sort only the k survivors
+        top_indices = np.argpartition(-scores, k - 1)[:k]
+        top_indices = top_indices[np.argsort(-scores[top_indices])]
         
-        # Build results
+        # Only include non-zero scores
+        top_indices = top_indices[scores[top_indices] > 0]
+        return self._ids[top_indices], scores[top_indices].astype(np.float32, copy=False)
+    
+    def _materialize(self, ids: np.ndarray, scores: np.ndarray) -> List[Dict[str, Any]]:
+        """Build search_bm25 result dicts from (ids, scores) arrays."""
         results = []
-        for idx in top_indices:
-            if scores[idx] > 0:  # Only include non-zero scores
-                msg = self._messages[idx]
-                results.append({
-                    'message': msg,
-                    'bm25_score': float(scores[idx]),
-                    'id': msg.id,
-                    'user_name': msg.user_name,
-                    'document': msg.message,
-                    'timestamp': msg.timestamp.isoformat(),
-                })
-        
-        logger.info("bm25_search_complete", results_count=len(results))
+        for msg_id, score in zip(ids.tolist(), scores.tolist()):
+            msg = self._message_by_id[msg_id]
+            results.append({
+                'message': msg,
+                'bm25_score': score,
+                'id': msg_id,
+                'user_name': msg.user_name,
+                'document': msg.message,
+                'timestamp': msg.timestamp.isoformat(),
+            })
         return results
     
+    def _query_term_counts(self, tokenized_query: List[str]) -> Dict[int, float]:
+        """Map query tokens to vocabulary columns with their counts (unknown terms dropped)."""
+        term_counts: Dict[int, float] = {}
+        for token in tokenized_query:
+            col = self._vocab.get(token)
+            if col is not None:
+                term_counts[col] = term_counts.get(col, 0.0) + 1.0
+        return term_counts
+    
+    def _bm25_scores(self, tokenized_query: List[str]) -> np.ndarray:
+        """
+        Score every document for a tokenized query.
+        
+        Only the matrix columns of the query's terms are touched, so the
+        cost scales with those terms' postings rather than the corpus size.
+        Uses a Numba-compiled scan when numba is installed, otherwise a
+        scipy column product.
+        
+        Args:
+            tokenized_query: Query tokens (duplicates count multiple times)
+            
+        Returns:
+            Array of BM25 scores, one per indexed message
+        """
+        term_counts = self._query_term_counts(tokenized_query)
+        if not term_counts:
+            return np.zeros(self._bm25_matrix.shape[0], dtype=np.float32)
+        
+        cols = np.fromiter(term_counts.keys(), dtype=np.int32, count=len(term_counts))
+        counts = np.fromiter(term_counts.values(), dtype=np.float32, count=len(term_counts))
+        
+        if _bm25_scan is not None:
+            # Compiled scan straight over the postings: no column-sliced copy of the matrix
+            matrix = self._bm25_matrix
+            scores = np.zeros(matrix.shape[0], dtype=np.float32)
+            _bm25_scan(matrix.indptr, matrix.indices, matrix.data, cols, counts, scores)
+            return scores
+        return self._bm25_matrix[:, cols] @ counts
+    
+    def _build_bm25_matrix(self, tokenized_corpus: List[List[str]]) -> None:
+        """
+        Precompute BM25 term weights as a CSC (docs x vocab) matrix.
+        
+        Each entry is idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl / avgdl)),
+        with Okapi idf = log(N - df + 0.5) - log(df + 0.5) (negative values
+        floored to epsilon * mean idf), so a query score is the sum of the
+        query terms' columns. CSC makes selecting those columns cheap.
+        
+        Args:
+            tokenized_corpus: Tokens of each indexed message
+        """
+        # Term-frequency matrix: one entry per token, duplicates summed
+        vocab: Dict[str, int] = {}
+        indptr = [0]
+        indices: List[int] = []
+        for tokens in tokenized_corpus:
+            indices.extend(vocab.setdefault(token, len(vocab)) for token in tokens)
+            indptr.append(len(indices))
+        
+        tf = sparse.csr_matrix(
+            (
+                np.ones(len(indices), dtype=np.float64),
+                np.asarray(indices, dtype=np.int32),
+                np.asarray(indptr, dtype=np.int64)
+            ),
+            shape=(len(tokenized_corpus), len(vocab))
+        )
+        tf.sum_duplicates()
+        
+        # Document lengths and per-term document frequencies
+        doc_len = np.diff(np.asarray(indptr, dtype=np.int64)).astype(np.float64)
+        avgdl = doc_len.mean() if doc_len.size else 0.0
+        df = np.bincount(tf.indices, minlength=len(vocab))
+        
+        idf = np.log(len(tokenized_corpus) - df + 0.5) - np.log(df + 0.5)
+        if idf.size:
+            idf[idf < 0] = BM25_EPSILON * idf.mean()
+        
+        # Okapi weighting of every stored tf, row by row
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len / (avgdl or 1.0))
+        row_norm = np.repeat(norm, np.diff(tf.indptr))
+        tf.data = idf[tf.indices] * tf.data * (BM25_K1 + 1) / (tf.data + row_norm)
+        
+        self._vocab = vocab
+        self._bm25_matrix = tf.astype(np.float32).tocsc()
+    
     def hybrid_search(
         self,
         query: str,
         semantic_results: List[Dict[str, Any]],
         bm25_weight: float = 0.5,
-        top_k: int = 30
+        top_k: int = 30,
+        fusion_mode: Literal['weighted', 'rrf'] = 'rrf'
     ) -> List[Dict[str, Any]]:
         """
-        Combine BM25 and semantic search results with weighted fusion.
+        Combine BM25 and semantic search results.
         
         Args:
             query: Search query
             semantic_results: Results from vector search (with distances)
+            bm25_weight: Weight for BM25 scores/ranks (0-1, default 0.5)
+            top_k: Number of final results to return
+            fusion_mode: 'rrf' (Reciprocal Rank Fusion, default) or 'weighted'
+                (max-normalized score fusion)
+            
+        Returns:
+            Reranked and merged results
+        """
+        # Get BM25 ids/scores with QUERY EXPANSION (dicts are built only for fused survivors)
+        bm25_ids, bm25_scores = self.search_bm25_topk(query, top_k=100, use_expansion=True)
+        
+        if fusion_mode == 'rrf':
+            return self.fuse_rrf(
+                semantic_results,
+                bm25_ids,
+                bm25_scores,
+                semantic_weight=1 - bm25_weight,
+                bm25_weight=bm25_weight,
+                top_k=top_k
+            )
+        return self.fuse(semantic_results, bm25_ids, bm25_scores, bm25_weight=bm25_weight, top_k=top_k)
+    
+    def fuse(
+        self,
+        semantic_results: List[Dict[str, Any]],
+        bm25_ids: np.ndarray,
+        bm25_scores: np.ndarray,
+        bm25_weight: float = 0.5,
+        top_k: int = 30
+    ) -> List[Dict[str, Any]]:
+        """
+        Fuse precomputed semantic and BM25 results with weighted scoring.
+        
+        Lets callers run the dense and sparse searches concurrently and
+        only pay for the (cheap) fusion step afterwards.
+        
+        Args:
+            semantic_results: Results from vector search (with distances)
+            bm25_ids: Message ids from search_bm25_topk
+            bm25_scores: BM25 scores from search_bm25_topk
             bm25_weight: Weight for BM25 scores (0-1, default 0.5)
             top_k: Number of final results to return
             
         Returns:
             Reranked and merged results
         """
-        # Get BM25 results with QUERY EXPANSION
-        bm25_results = self.search_bm25(query, top_k=100, use_expansion=True)
+        semantic_weight = 1 - bm25_weight
         
-        # Create score dictionaries
-        bm25_scores = {r['id']: r['bm25_score'] for r in bm25_results}
+        # Create score dictionaries, max-normalized with vector ops
+        # (a side with zero weight can't affect the ranking, so it isn't normalized)
+        bm25_scores = self._max_normalized(
+            bm25_ids.tolist(), bm25_scores, normalize=bm25_weight > 0
+        )
         
         # Normalize semantic scores (distances -> similarities)
         # Lower distance = higher similarity
-        semantic_scores = {}
-        for r in semantic_results:
-            msg_id = r.get('id')
-            distance = r.get('distance', 2.0)
-            # Convert distance to similarity (inverse + normalize)
-            similarity = 1.0 / (1.0 + distance)
-            semantic_scores[msg_id] = similarity
-        
-        # Normalize BM25 scores
-        if bm25_scores:
-            max_bm25 = max(bm25_scores.values()) if bm25_scores else 1.0
-            bm25_scores = {k: v / max_bm25 for k, v in bm25_scores.items()}
-        
-        # Normalize semantic scores
-        if semantic_scores:
-            max_semantic = max(semantic_scores.values()) if semantic_scores else 1.0
-            semantic_scores = {k: v / max_semantic for k, v in semantic_scores.items()}
-        
-        # Combine scores with weighted fusion
-        all_ids = set(bm25_scores.keys()) | set(semantic_scores.keys())
-        
-        combined_scores = {}
-        for msg_id in all_ids:
-            bm25_score = bm25_scores.get(msg_id, 0.0)
-            semantic_score = semantic_scores.get(msg_id, 0.0)
-            
-            # Weighted combination
-            combined_score = (
-                bm25_weight * bm25_score + 
-                (1 - bm25_weight) * semantic_score
-            )
-            combined_scores[msg_id] = combined_score
+        distances = np.fromiter(
+            (r.get('distance', 2.0) for r in semantic_results),
+            dtype=np.float32,
+            count=len(semantic_results)
+        )
+        semantic_scores = self._max_normalized(
+            [r.get('id') for r in semantic_results],
+            1.0 / (1.0 + distances),
+            normalize=semantic_weight > 0
+        )
+        
+        # Combine scores with weighted fusion (one additive pass per source)
+        combined_scores: Dict[str, float] = defaultdict(float)
+        for msg_id, score in bm25_scores.items():
+            combined_scores[msg_id] += bm25_weight * score
+        for msg_id, score in semantic_scores.items():
+            combined_scores[msg_id] += semantic_weight * score
         
-        # Sort by combined score
-        sorted_ids = sorted(
-            combined_scores.keys(),
-            key=lambda x: combined_scores[x],
-            reverse=True
-        )[:top_k]
+        # Build final results (O(1) lookup of each survivor in either source)
+        sem_by_id = {r.get('id'): r for r in semantic_results}
         
-        # Build final results
         results = []
-        for msg_id in sorted_ids:
+        for msg_id, combined_score in heapq.nlargest(
+            top_k, combined_scores.items(), key=itemgetter(1)
+        ):
             # Get message from either source
-            msg_data = None
-            for r in semantic_results:
-                if r.get('id') == msg_id:
-                    msg_data = r
-                    break
-            
-            if not msg_data:
-                for r in bm25_results:
-                    if r['id'] == msg_id:
-                        msg_data = {
-                            'document': r['document'],
-                            'user_name': r['user_name'],
-                            'timestamp': r['timestamp'],
-                            'id': r['id'],
-                            'distance': 0.5  # Placeholder
-                        }
-                        break
+            msg_data = sem_by_id.get(msg_id)
+            if msg_data is None and msg_id in bm25_scores:
+                msg_data = self._from_bm25(msg_id)
             
             if msg_data:
-                msg_data['hybrid_score'] = combined_scores[msg_id]
+                msg_data['hybrid_score'] = combined_score
                 msg_data['bm25_score'] = bm25_scores.get(msg_id, 0.0)
                 msg_data['semantic_score'] = semantic_scores.get(msg_id, 0.0)
                 results.append(msg_data)
@@ -208,21 +468,161 @@ class HybridRetriever:
         
         return results
     
+    def fuse_rrf(
+        self,
+        semantic_results: List[Dict[str, Any]],
+        bm25_ids: np.ndarray,
+        bm25_scores: np.ndarray,
+        semantic_weight: float = 0.5,
+        bm25_weight: float = 0.5,
+        top_k: int = 30,
+        rrf_k: int = RRF_K
+    ) -> List[Dict[str, Any]]:
+        """
+        Fuse precomputed semantic and BM25 results with weighted Reciprocal Rank Fusion.
+        
+        score(d) = semantic_weight / (rrf_k + dense_rank) + bm25_weight / (rrf_k + bm25_rank)
+        
+        Only ranks are used, so there is no per-query score normalization and
+        the result is insensitive to the scale of distances vs BM25 scores.
+        The raw scores are still reported: bm25_score, and semantic_score as the
+        similarity 1 / (1 + distance) (0.0 for hits missing from either side).
+        
+        Args:
+            semantic_results: Results from vector search, best first
+            bm25_ids: Message ids from search_bm25_topk, best first
+            bm25_scores: BM25 scores from search_bm25_topk
+            semantic_weight: Weight of the dense ranking
+            bm25_weight: Weight of the BM25 ranking
+            top_k: Number of final results to return
+            rrf_k: RRF smoothing constant
+            
+        Returns:
+            Reranked and merged results
+        """
+        sem_by_id = {r['id']: r for r in semantic_results}
+        bm25_by_id = dict(zip(bm25_ids.tolist(), bm25_scores.tolist()))
+        
+        combined_scores: Dict[str, float] = defaultdict(float)
+        for rank, r in enumerate(semantic_results):
+            combined_scores[r['id']] += semantic_weight / (rrf_k + rank)
+        for rank, msg_id in enumerate(bm25_by_id):
+            combined_scores[msg_id] += bm25_weight / (rrf_k + rank)
+        
+        results = []
+        for msg_id, score in heapq.nlargest(top_k, combined_scores.items(), key=itemgetter(1)):
+            msg_data = sem_by_id.get(msg_id)
+            if msg_data is None:
+                msg_data = self._from_bm25(msg_id)
+            
+            msg_data['hybrid_score'] = score
+            msg_data['bm25_score'] = bm25_by_id.get(msg_id, 0.0)
+            msg_data['semantic_score'] = (
+                1.0 / (1.0 + msg_data.get('distance', 2.0)) if msg_id in sem_by_id else 0.0
+            )
+            results.append(msg_data)
+        
+        logger.info(
+            "rrf_fusion_complete",
+            total_results=len(results),
+            bm25_only=len(bm25_by_id),
+            semantic_only=len(sem_by_id)
+        )
+        
+        return results
+    
+    @staticmethod
+    def _max_normalized(
+        ids: List[str],
+        scores: np.ndarray,
+        normalize: bool = True
+    ) -> Dict[str, float]:
+        """Scale scores by the inverse of their maximum and map them back to their ids."""
+        if normalize and scores.size:
+            max_score = scores.max()
+            if max_score:
+                scores = scores * (1.0 / max_score)
+        return dict(zip(ids, scores.tolist()))
+    
+    def _from_bm25(self, msg_id: str) -> Dict[str, Any]:
+        """Build a fused-result entry for a BM25-only hit (no vector distance)."""
+        msg = self._message_by_id[msg_id]
+        return {
+            'document': msg.message,
+            'user_name': msg.user_name,
+            'timestamp': msg.timestamp.isoformat(),
+            'id': msg_id,
+            'distance': 0.5  # Placeholder
+        }
+    
+    def _index_cache_path(self, messages: List[Message]) -> Optional[Path]:
+        """Path of the persisted BM25 index, keyed by a hash of the corpus (None if disabled)."""
+        if not self.settings.bm25_cache_dir:
+            return None
+        digest = hashlib.sha256()
+        for msg in messages:
+            digest.update(f"{msg.id}\x1f{msg.user_name}\x1f{msg.message}\x1e".encode())
+        return Path(self.settings.bm25_cache_dir) / f"bm25_index_{digest.hexdigest()[:16]}.npz"
+    
+    def _load_index(self, path: Optional[Path]) -> bool:
+        """Load a persisted term-weight matrix and vocabulary; False if missing/unreadable."""
+        if path is None or not path.exists():
+            return False
+        try:
+            with np.load(path, allow_pickle=False) as index:
+                matrix = sparse.csc_matrix(
+                    (index['data'], index['indices'], index['indptr']),
+                    shape=tuple(index['shape'])
+                )
+                vocab = {sys.intern(term): col for col, term in enumerate(index['vocab'].tolist())}
+        except Exception as e:
+            logger.warning("bm25_index_cache_unreadable", path=str(path), error=str(e))
+            return False
+        
+        if matrix.shape != (len(self._ids), len(vocab)):
+            logger.warning("bm25_index_cache_mismatch", path=str(path))
+            return False
+        
+        self._bm25_matrix = matrix
+        self._vocab = vocab
+        logger.info("bm25_index_cache_loaded", path=str(path))
+        return True
+    
+    def _save_index(self, path: Optional[Path]) -> None:
+        """Persist the term-weight matrix and vocabulary; failures only cost a rebuild later."""
+        if path is None:
+            return
+        matrix = self._bm25_matrix
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            np.savez(
+                path,
+                data=matrix.data,
+                indices=matrix.indices,
+                indptr=matrix.indptr,
+                shape=np.asarray(matrix.shape, dtype=np.int64),
+                # Terms in column order
+                vocab=np.asarray(list(self._vocab), dtype=str)
+            )
+        except OSError as e:
+            logger.warning("bm25_index_cache_save_failed", path=str(path), error=str(e))
+    
     @staticmethod
     def _tokenize(text: str) -> List[str]:
         """
         Tokenization: lowercase + remove punctuation + split.
         This ensures 'london?' matches 'london'
+        
+        Tokens are interned, so a term repeated across the corpus is one
+        shared string and vocabulary lookups can short-circuit on identity.
         """
-        import re
         # Remove punctuation, lowercase, split
-        text = re.sub(r'[^\w\s]', ' ', text.lower())
-        return text.split()
+        return [sys.intern(token) for token in _TOKEN_RE.sub(' ', text.lower()).split()]
     
     @property
     def is_indexed(self) -> bool:
         """Check if BM25 index is ready."""
-        return self._bm25 is not None
+        return self._bm25_matrix is not None
 
 
 # Global singleton
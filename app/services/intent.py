@@ -0,0 +1,95 @@
+"""Fast regex intent classifier for questions that don't need retrieval."""
+
+from typing import Optional
+import re
+
+# Intents
+QUESTION = "question"
+SMALL_TALK = "small_talk"
+META = "meta"
+
+# Patterns must match the WHOLE (normalized) question, so "hi, when is
+# Layla going to London?" is still treated as a real question
+_SMALL_TALK_PATTERNS = [
+    r"hi+( there)?",
+    r"hello+( there)?",
+    r"hey+( there)?",
+    r"hiya",
+    r"howdy",
+    r"yo",
+    r"greetings",
+    r"good (morning|afternoon|evening|day)",
+    r"how are you( doing)?( today)?",
+    r"how('s| is) it going",
+    r"what'?s up",
+    r"sup",
+    r"thanks?( you)?( so much| a lot)?",
+    r"thx",
+    r"ty",
+    r"cheers",
+    r"much appreciated",
+    r"(great|good|nice|perfect|awesome|cool|ok|okay|k|got it|understood|sounds good)",
+    r"bye",
+    r"goodbye",
+    r"see (you|ya)( later)?",
+    r"have a (good|nice|great) (day|one|night)",
+    r"test(ing)?",
+]
+
+_META_PATTERNS = [
+    r"who (built|made|created|developed|wrote) (you|this|this app|this service)",
+    r"who are you",
+    r"what are you",
+    r"what is this( app| service| system)?",
+    r"what can you do",
+    r"what do you do",
+    r"what can i ask( you)?",
+    r"what (kind|sort|type) of questions can i ask( you)?",
+    r"how do(es)? (you|this|this app|this service) work",
+    r"how do i use (you|this|this app|this service)",
+    r"are you (a bot|an ai|human|real)",
+    r"help",
+    r"help me",
+    r"menu",
+    r"commands",
+]
+
+_SMALL_TALK_RE = re.compile(r"(?:" + "|".join(_SMALL_TALK_PATTERNS) + r")")
+_META_RE = re.compile(r"(?:" + "|".join(_META_PATTERNS) + r")")
+_STRIP_RE = re.compile(r"[^\w\s']+")
+
+_CANNED_ANSWERS = {
+    SMALL_TALK: (
+        "Hi! I can answer questions about member messages - for example "
+        "\"When is Layla planning her trip to London?\""
+    ),
+    META: (
+        "I'm the Aurora Q&A assistant. I answer natural language questions about "
+        "member messages by searching them and summarizing what members said - "
+        "try asking about a member's plans, preferences or bookings."
+    ),
+}
+
+
+def classify_intent(question: str) -> str:
+    """
+    Classify a question as small talk, a meta question, or a real question.
+    
+    Args:
+        question: User question
+        
+    Returns:
+        One of SMALL_TALK, META or QUESTION
+    """
+    text = " ".join(_STRIP_RE.sub(" ", question.lower()).split())
+    
+    if _SMALL_TALK_RE.fullmatch(text):
+        return SMALL_TALK
+    if _META_RE.fullmatch(text):
+        return META
+    return QUESTION
+
+
+def get_canned_answer(intent: str) -> Optional[str]:
+    """Get the canned answer for an intent, or None if it needs retrieval."""
+    return _CANNED_ANSWERS.get(intent)
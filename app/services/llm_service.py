@@ -1,6 +1,7 @@
 """LLM service using Groq for answer generation."""
 
-from groq import Groq
+from groq import AsyncGroq, Groq
+import asyncio
 from typing import Dict, Any, Optional
 import json
 from app.core.logging import get_logger
@@ -8,6 +9,27 @@ from app.core.config import get_settings
 
 logger = get_logger(__name__)
 
+# System instructions sent with every answer request
+_SYSTEM_PROMPT = (
+    "You are a concierge assistant analyzing member messages. "
+    "Provide direct, specific answers without referencing message numbers. "
+
+    "CRITICAL INSTRUCTIONS FOR DATES/TIMES:\n"
+    "- Each message has a 'Date:' field showing when it was sent\n"
+    "- When someone says 'next month', calculate: message date + 1 month\n"
+    "- When someone says 'tomorrow', 'next week', 'starting Monday', calculate the actual date from the message timestamp\n"
+    "- ALWAYS extract and state specific dates/times when available\n"
+    "- Example: If message dated '2025-10-23' says 'next month', answer should say 'November 2025'\n"
+
+    "OTHER INSTRUCTIONS:\n"
+    "- For preferences: List specific items mentioned positively\n"
+    "- For counting: Count carefully and state the number\n"
+    "- Be confident and specific when the information is in the messages\n"
+    "- Synthesize information naturally from multiple messages\n"
+    "- Write in a natural, conversational tone\n"
+    "- Never say 'not explicitly stated' if you can infer it from context + timestamps"
+)
+
 
 class LLMService:
     """Service for generating answers using Groq LLM."""
@@ -15,15 +37,26 @@ class LLMService:
     def __init__(self):
         self.settings = get_settings()
         self._client: Optional[Groq] = None
+        # The async client's connection pool belongs to the loop it was created on
+        self._async_client: Optional[AsyncGroq] = None
+        self._async_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._system_message: Optional[Dict[str, str]] = None
+        # Per-request generation parameters (settings are fixed for the process)
+        self._model = self.settings.llm_model
+        self._temperature = self.settings.llm_temperature
+        self._max_tokens = self.settings.llm_max_tokens
     
     def initialize(self) -> None:
-        """Initialize the Groq client."""
+        """Initialize the Groq client (the async client is created per event loop)."""
         if self._client is not None:
             logger.info("llm_client_already_initialized")
             return
         
         logger.info("initializing_groq_client")
         
+        # Built once and shared by every request
+        self._system_message = {"role": "system", "content": _SYSTEM_PROMPT}
+        
         try:
             # Add timeout to prevent hanging connections
             self._client = Groq(
@@ -54,92 +87,136 @@ class LLMService:
         if self._client is None:
             self.initialize()
         
-        # Build context string
-        context = self._build_context(context_messages)
-        
-        # Build prompt
-        prompt = self._build_prompt(question, context)
-        
-        logger.info("generating_answer", question=question, context_count=len(context_messages))
+        prompt = self._prepare_prompt(question, context_messages)
         
         try:
             # Call Groq with explicit timeout
             response = self._client.chat.completions.create(
-                model=self.settings.llm_model,
+                model=self._model,
                 timeout=25.0,  # Per-request timeout
-                messages=[
-        {
-            "role": "system",
-            "content": (
-                "You are a concierge assistant analyzing member messages. "
-                "Provide direct, specific answers without referencing message numbers. "
-                
-                "CRITICAL INSTRUCTIONS FOR DATES/TIMES:\n"
-                "- Each message has a 'Date:' field showing when it was sent\n"
-                "- When someone says 'next month', calculate: message date + 1 month\n"
-                "- When someone says 'tomorrow', 'next week', 'starting Monday', calculate the actual date from the message timestamp\n"
-                "- ALWAYS extract and state specific dates/times when available\n"
-                "- Example: If message dated '2025-10-23' says 'next month', answer should say 'November 2025'\n"
-                
-                "OTHER INSTRUCTIONS:\n"
-                "- For preferences: List specific items mentioned positively\n"
-                "- For counting: Count carefully and state the number\n"
-                "- Be confident and specific when the information is in the messages\n"
-                "- Synthesize information naturally from multiple messages\n"
-                "- Write in a natural, conversational tone\n"
-                "- Never say 'not explicitly stated' if you can infer it from context + timestamps"
-            )
-        },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=self.settings.llm_temperature,
-                max_tokens=self.settings.llm_max_tokens,
+                messages=self._build_messages(prompt),
+                temperature=self._temperature,
+                max_tokens=self._max_tokens,
             )
             
-            answer_text = response.choices[0].message.content.strip()
+            return self._build_result(response, context_messages)
             
-            # Extract sources (member names) from context
-            sources = list(set(msg['user_name'] for msg in context_messages))
-            
-            # Determine confidence based on context relevance
-            confidence = self._determine_confidence(context_messages)
+        except Exception as e:
+            logger.error("failed_to_generate_answer", error=str(e))
+            raise Exception(f"Failed to generate answer: {str(e)}")
+    
+    async def agenerate_answer(
+        self,
+        question: str,
+        context_messages: list[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Async variant of generate_answer using the AsyncGroq client.
+        
+        Awaits the Groq round-trip instead of blocking a thread, so the
+        event loop can serve other requests meanwhile.
+        
+        Args:
+            question: User's natural language question
+            context_messages: List of relevant message contexts
             
-            logger.info(
-                "answer_generated",
-                answer_length=len(answer_text),
-                sources_count=len(sources),
-                confidence=confidence
+        Returns:
+            Dictionary with answer, confidence, and sources
+        """
+        if self._client is None:
+            self.initialize()
+        
+        prompt = self._prepare_prompt(question, context_messages)
+        
+        try:
+            response = await self._get_async_client().chat.completions.create(
+                model=self._model,
+                timeout=25.0,  # Per-request timeout
+                messages=self._build_messages(prompt),
+                temperature=self._temperature,
+                max_tokens=self._max_tokens,
+                stream=False,
             )
             
-            return {
-                "answer": answer_text,
-                "confidence": confidence,
-                "sources": sources
-            }
+            return self._build_result(response, context_messages)
             
         except Exception as e:
             logger.error("failed_to_generate_answer", error=str(e))
             raise Exception(f"Failed to generate answer: {str(e)}")
     
-    def _build_context(self, context_messages: list[Dict[str, Any]]) -> str:
-        """Build context string from retrieved messages."""
-        context_parts = []
+    def _get_async_client(self) -> AsyncGroq:
+        """
+        Get the AsyncGroq client for the running event loop.
         
-        for i, msg in enumerate(context_messages, 1):
-            # Use original_message if available (from metadata), otherwise use document
-            original_msg = msg.get('original_message', msg.get('document', ''))
-            
-            context_parts.append(
-                f"Message {i}:\n"
-                f"From: {msg['user_name']}\n"
-                f"Date: {msg['timestamp']}\n"
-                f"Content: {original_msg}\n"
+        Pooled connections can't be reused from another loop, so a client is
+        created on first use in each loop (normally just the serving loop).
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_loop is not loop:
+            self._async_client = AsyncGroq(
+                api_key=self.settings.groq_api_key,
+                timeout=30.0,
+                max_retries=2
             )
+            self._async_loop = loop
+        return self._async_client
+    
+    async def aclose(self) -> None:
+        """Close the async client if it belongs to the running event loop."""
+        if self._async_client is not None and self._async_loop is asyncio.get_running_loop():
+            await self._async_client.close()
+        self._async_client = None
+        self._async_loop = None
+    
+    def _prepare_prompt(self, question: str, context_messages: list[Dict[str, Any]]) -> str:
+        """Build the user prompt from the question and retrieved context."""
+        # Build context string
+        context = self._build_context(context_messages)
         
-        return "\n".join(context_parts)
+        # Build prompt
+        prompt = self._build_prompt(question, context)
+        
+        logger.info("generating_answer", question=question, context_count=len(context_messages))
+        
+        return prompt
+    
+    def _build_messages(self, prompt: str) -> list[Dict[str, str]]:
+        """Build the chat messages (system instructions + user prompt)."""
+        return [self._system_message, {"role": "user", "content": prompt}]
+    
+    def _build_result(self, response: Any, context_messages: list[Dict[str, Any]]) -> Dict[str, Any]:
+        """Turn a Groq completion into the answer/confidence/sources dict."""
+        answer_text = response.choices[0].message.content.strip()
+        
+        # Extract sources (member names) from context, in retrieval order
+        sources = list(dict.fromkeys(msg['user_name'] for msg in context_messages))
+        
+        # Determine confidence based on context relevance
+        confidence = self._determine_confidence(context_messages)
+        
+        logger.info(
+            "answer_generated",
+            answer_length=len(answer_text),
+            sources_count=len(sources),
+            confidence=confidence
+        )
+        
+        return {
+            "answer": answer_text,
+            "confidence": confidence,
+            "sources": sources
+        }
+    
+    def _build_context(self, context_messages: list[Dict[str, Any]]) -> str:
+        """Build context string from retrieved messages."""
+        return "\n".join(
+            f"Message {i}:\n"
+            f"From: {msg['user_name']}\n"
+            f"Date: {msg['timestamp']}\n"
+            # Use original_message if available (from metadata), otherwise use document
+            f"Content: {msg.get('original_message', msg.get('document', ''))}\n"
+            for i, msg in enumerate(context_messages, 1)
+        )
     
     def _build_prompt(self, question: str, context: str) -> str:
         """Build the full prompt for the LLM."""
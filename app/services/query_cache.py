@@ -0,0 +1,265 @@
+"""Caches for reusing search results and answers across repeated questions."""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+import threading
+import time
+import numpy as np
+from app.core.logging import get_logger
+from app.core.config import get_settings
+
+logger = get_logger(__name__)
+
+# SimHash layout: several short signatures (bands) so near-duplicates
+# only need to collide in one band to become candidates
+LSH_TABLES = 4
+LSH_BITS_PER_TABLE = 8
+
+
+class QueryCache:
+    """
+    Two-tier LRU cache of semantic search results.
+    
+    Entries are keyed on the normalized question (see text_norm.normalize).
+    Tier 1 is an exact match on that key and skips both
+    the embedding pass and the vector search. Tier 2 is a SimHash (random
+    hyperplane LSH) index over question embeddings; candidates are verified
+    with cosine similarity before their results are reused. All methods are
+    thread-safe so lookups can run on worker threads.
+    """
+    
+    def __init__(self, max_entries: int = 10000, similarity_threshold: float = 0.97):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[str, Tuple[np.ndarray, Dict[str, Any]]]" = OrderedDict()
+        self._signatures: Dict[str, Tuple[int, ...]] = {}
+        self._buckets: List[Dict[int, Set[str]]] = [{} for _ in range(LSH_TABLES)]
+        self._planes: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+    
+    def get(self, key: str) -> Optional[Tuple[np.ndarray, Dict[str, Any]]]:
+        """
+        Look up an exact (normalized) question.
+        
+        Args:
+            key: Normalized question
+            
+        Returns:
+            Tuple of (embedding, search results) or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+    
+    def get_similar(self, embedding: np.ndarray) -> Optional[Dict[str, Any]]:
+        """
+        Look up search results for a near-duplicate question embedding.
+        
+        Args:
+            embedding: Question embedding
+            
+        Returns:
+            Cached search results or None on a miss
+        """
+        vector = self._unit(embedding)
+        with self._lock:
+            if not self._entries:
+                self.misses += 1
+                return None
+            
+            candidates: Set[str] = set()
+            for table, band in zip(self._buckets, self._signature(vector)):
+                candidates.update(table.get(band, ()))
+            
+            best_key, best_similarity = None, self.similarity_threshold
+            for key in candidates:
+                similarity = float(np.dot(self._entries[key][0], vector))
+                if similarity >= best_similarity:
+                    best_key, best_similarity = key, similarity
+            
+            if best_key is None:
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(best_key)
+            self.similar_hits += 1
+            results = self._entries[best_key][1]
+        
+        logger.info("query_cache_similar_hit", similarity=round(best_similarity, 4))
+        return results
+    
+    def put(self, key: str, embedding: np.ndarray, results: Dict[str, Any]) -> None:
+        """
+        Store search results for a question, evicting the least recently used entry.
+        
+        Args:
+            key: Normalized question
+            embedding: Question embedding
+            results: Search results returned by the vector store
+        """
+        vector = self._unit(embedding)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return
+            
+            signature = self._signature(vector)
+            self._entries[key] = (vector, results)
+            self._signatures[key] = signature
+            for table, band in zip(self._buckets, signature):
+                table.setdefault(band, set()).add(key)
+            
+            if len(self._entries) > self.max_entries:
+                self._evict(next(iter(self._entries)))
+    
+    def clear(self) -> None:
+        """Drop all cached entries (e.g. after reindexing)."""
+        with self._lock:
+            self._entries.clear()
+            self._signatures.clear()
+            self._buckets = [{} for _ in range(LSH_TABLES)]
+        logger.info("query_cache_cleared")
+    
+    def _evict(self, key: str) -> None:
+        """Remove an entry and its LSH bucket memberships."""
+        del self._entries[key]
+        for table, band in zip(self._buckets, self._signatures.pop(key)):
+            members = table.get(band)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del table[band]
+    
+    def _signature(self, vector: np.ndarray) -> Tuple[int, ...]:
+        """Compute one SimHash band per LSH table."""
+        if self._planes is None:
+            rng = np.random.default_rng(0)
+            self._planes = rng.standard_normal(
+                (LSH_TABLES * LSH_BITS_PER_TABLE, vector.shape[0])
+            ).astype(np.float32)
+        
+        bits = (self._planes @ vector) > 0
+        weights = 1 << np.arange(LSH_BITS_PER_TABLE)
+        return tuple(
+            int(band @ weights)
+            for band in bits.reshape(LSH_TABLES, LSH_BITS_PER_TABLE)
+        )
+    
+    @staticmethod
+    def _unit(embedding: np.ndarray) -> np.ndarray:
+        """Convert an embedding to a unit-length float32 vector."""
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class ResponseCache:
+    """
+    TTL + LRU cache of full answers keyed on the normalized question
+    (see text_norm.normalize).
+    
+    Serves exact repeats without retrieval or an LLM call.
+    """
+    
+    def __init__(
+        self,
+        ttl_seconds: int = 3600,
+        max_entries: int = 10000,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Get the cached response for a question if it hasn't expired.
+        
+        Args:
+            key: Normalized question
+            
+        Returns:
+            Cached response or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            expires_at, response = entry
+            if expires_at < self._clock():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return response
+    
+    def put(self, key: str, response: Any) -> None:
+        """
+        Cache a response for a question.
+        
+        Args:
+            key: Normalized question
+            response: Response to serve for repeats
+        """
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl_seconds, response)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop all cached responses (e.g. after reindexing)."""
+        with self._lock:
+            self._entries.clear()
+        logger.info("response_cache_cleared")
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Global singletons
+_query_cache: Optional[QueryCache] = None
+_response_cache: Optional[ResponseCache] = None
+
+
+def get_query_cache() -> QueryCache:
+    """Get or create the global QueryCache instance."""
+    global _query_cache
+    if _query_cache is None:
+        settings = get_settings()
+        _query_cache = QueryCache(
+            max_entries=settings.query_cache_size,
+            similarity_threshold=settings.query_cache_similarity
+        )
+    return _query_cache
+
+
+def get_response_cache() -> ResponseCache:
+    """Get or create the global ResponseCache instance."""
+    global _response_cache
+    if _response_cache is None:
+        settings = get_settings()
+        _response_cache = ResponseCache(
+            ttl_seconds=settings.cache_ttl_seconds,
+            max_entries=settings.query_cache_size
+        )
+    return _response_cache
@@ -0,0 +1,21 @@
+"""Question normalization shared by the caches and BM25."""
+
+from functools import lru_cache
+from typing import Tuple
+from app.services.hybrid_retrieval import HybridRetriever
+
+
+@lru_cache(maxsize=10000)
+def normalize(question: str) -> Tuple[str, Tuple[str, ...]]:
+    """
+    Normalize a question once per distinct string.
+    
+    Args:
+        question: Raw user question
+        
+    Returns:
+        Tuple of (cache key: lowercased + whitespace-collapsed question,
+        BM25 tokens)
+    """
+    key = " ".join(question.lower().split())
+    return key, tuple(HybridRetriever._tokenize(question))
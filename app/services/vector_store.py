@@ -1,14 +1,28 @@
 """ChromaDB vector store for semantic search."""
 
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import hashlib
+import threading
 import chromadb
 from chromadb.config import Settings as ChromaSettings
 from typing import List, Dict, Any, Optional
+import numpy as np
 from app.models.schemas import Message
 from app.core.logging import get_logger
 from app.core.config import get_settings
 
 logger = get_logger(__name__)
 
+# Chroma's default HNSW search breadth (ef) at query time
+HNSW_DEFAULT_SEARCH_EF = 10
+
+# Concurrent collection.add calls while bulk indexing (writes release the GIL)
+INDEX_WRITE_WORKERS = 4
+
+# Recent search results kept per (query embedding, top_k, include_documents)
+SEARCH_CACHE_SIZE = 128
+
 
 class VectorStore:
     """Manages the ChromaDB vector database for semantic search."""
@@ -17,6 +31,10 @@ class VectorStore:
         self.settings = get_settings()
         self._client: Optional[chromadb.Client] = None
         self._collection: Optional[chromadb.Collection] = None
+        self._search_cache: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+        self._search_cache_lock = threading.Lock()
+        self.search_cache_hits = 0
+        self.search_cache_misses = 0
     
     def initialize(self) -> None:
         """Initialize ChromaDB client and collection."""
@@ -29,13 +47,22 @@ class VectorStore:
         try:
             self._client = chromadb.PersistentClient(
                 path=self.settings.chromadb_path,
-                settings=ChromaSettings(anonymized_telemetry=False)
+                settings=ChromaSettings(
+                    anonymized_telemetry=False,
+                    # Keep loaded HNSW segments resident, bounded by an LRU budget
+                    chroma_segment_cache_policy="LRU",
+                    chroma_memory_limit_bytes=self.settings.chromadb_memory_limit_bytes
+                )
             )
             
-            # Get or create collection
+            # Get or create collection (HNSW settings only apply on creation);
+            # keep the search breadth at 2x the candidate count to preserve recall
             self._collection = self._client.get_or_create_collection(
                 name=self.settings.collection_name,
-                metadata={"description": "Member messages for Q&A"}
+                metadata={
+                    "description": "Member messages for Q&A",
+                    "hnsw:search_ef": max(HNSW_DEFAULT_SEARCH_EF, 2 * self.settings.dense_top_k)
+                }
             )
             
             logger.info(
@@ -51,14 +78,14 @@ class VectorStore:
     def index_messages(
         self,
         messages: List[Message],
-        embeddings: List[List[float]]
+        embeddings: np.ndarray
     ) -> None:
         """
         Index messages with their embeddings in ChromaDB.
         
         Args:
             messages: List of Message objects
-            embeddings: Corresponding embeddings
+            embeddings: Corresponding embeddings (2D float32 array, one row per message)
         """
         if self._collection is None:
             self.initialize()
@@ -71,53 +98,74 @@ class VectorStore:
         
         logger.info("indexing_messages", count=len(messages))
         
-        # Prepare data for ChromaDB
-        ids = [msg.id for msg in messages]
+        # Cached search results predate the new records
+        self.clear_search_cache()
         
-        # ENRICHED DOCUMENTS: Include user name + date in the TEXT for better semantic matching!
-        # This allows queries like "When is Layla planning..." to match "Layla Kawaguchi [Date]..."
-        documents = [
-            f"{msg.user_name} ({msg.timestamp.strftime('%B %d, %Y')}): {msg.message}"
-            for msg in messages
-        ]
-        
-        metadatas = [
-            {
+        # Prepare data for ChromaDB in one pass (each message field read once)
+        n = len(messages)
+        ids: List[str] = [None] * n
+        documents: List[str] = [None] * n
+        metadatas: List[Dict[str, Any]] = [None] * n
+        for i, msg in enumerate(messages):
+            user_name = msg.user_name
+            timestamp = msg.timestamp
+            text = msg.message
+            ids[i] = msg.id
+            
+            # ENRICHED DOCUMENTS: Include user name + date in the TEXT for better semantic matching!
+            # This allows queries like "When is Layla planning..." to match "Layla Kawaguchi [Date]..."
+            documents[i] = f"{user_name} ({timestamp.strftime('%B %d, %Y')}): {text}"
+            
+            metadatas[i] = {
                 "user_id": msg.user_id,
-                "user_name": msg.user_name,
-                "timestamp": msg.timestamp.isoformat(),
-                "original_message": msg.message  # Keep original for display
+                "user_name": user_name,
+                "timestamp": timestamp.isoformat(),
+                "original_message": text  # Keep original for display
             }
-            for msg in messages
-        ]
         
-        # Add to collection in batches
+        # Add to collection in batches, several in flight at once so one batch's
+        # write overlaps the next one's preparation. Batches may land in any
+        # order: records are keyed by id, so add() is order-independent.
         batch_size = 100
-        for i in range(0, len(messages), batch_size):
-            end_idx = min(i + batch_size, len(messages))
-            
-            self._collection.add(
-                ids=ids[i:end_idx],
-                embeddings=embeddings[i:end_idx],
-                documents=documents[i:end_idx],
-                metadatas=metadatas[i:end_idx]
-            )
+        with ThreadPoolExecutor(max_workers=INDEX_WRITE_WORKERS) as executor:
+            futures = {}
+            for i in range(0, len(messages), batch_size):
+                end_idx = min(i + batch_size, len(messages))
+                future = executor.submit(
+                    self._collection.add,
+                    ids=ids[i:end_idx],
+                    embeddings=embeddings[i:end_idx],
+                    documents=documents[i:end_idx],
+                    metadatas=metadatas[i:end_idx]
+                )
+                futures[future] = (i, end_idx)
             
-            logger.info("indexed_batch", start=i, end=end_idx)
+            for future in as_completed(futures):
+                future.result()  # Re-raise a failed write
+                start, end = futures[future]
+                logger.info("indexed_batch", start=start, end=end)
         
         logger.info("indexing_complete", total=self._collection.count())
     
     def search(
         self,
-        query_embedding: List[float],
-        top_k: int = 10
+        query_embedding: np.ndarray,
+        top_k: int = 10,
+        include_documents: bool = False
     ) -> Dict[str, Any]:
         """
         Perform semantic search on the vector store.
         
+        Results for a repeated query embedding are served from a small LRU
+        (SEARCH_CACHE_SIZE entries), cleared whenever messages are indexed.
+        The cached dict is shared, so callers must not mutate it.
+        
         Args:
-            query_embedding: Query embedding vector
+            query_embedding: Query embedding vector (float32 array)
             top_k: Number of results to return
+            include_documents: Fetch the stored (name + date enriched) documents;
+                by default documents are the original messages from metadata,
+                which spares Chroma serializing the document text
             
         Returns:
             Dictionary with ids, documents, metadatas, and distances
@@ -125,20 +173,71 @@ class VectorStore:
         if self._collection is None:
             self.initialize()
         
+        cache_key = self._search_cache_key(query_embedding, top_k, include_documents)
+        with self._search_cache_lock:
+            cached = self._search_cache.get(cache_key)
+            if cached is not None:
+                self._search_cache.move_to_end(cache_key)
+                self.search_cache_hits += 1
+                logger.info(
+                    "search_cache_hit",
+                    hits=self.search_cache_hits,
+                    misses=self.search_cache_misses
+                )
+                return cached
+            self.search_cache_misses += 1
+        
+        include = ["metadatas", "distances"]
+        if include_documents:
+            include.append("documents")
+        
         results = self._collection.query(
             query_embeddings=[query_embedding],
             n_results=top_k,
-            include=["documents", "metadatas", "distances"]
+            include=include
         )
         
         logger.info("search_completed", results_count=len(results['ids'][0]))
         
-        return {
+        metadatas = results['metadatas'][0]
+        if include_documents:
+            documents = results['documents'][0]
+        else:
+            documents = [metadata.get('original_message', '') for metadata in metadatas]
+        
+        search_results = {
             'ids': results['ids'][0],
-            'documents': results['documents'][0],
-            'metadatas': results['metadatas'][0],
+            'documents': documents,
+            'metadatas': metadatas,
             'distances': results['distances'][0]
         }
+        
+        with self._search_cache_lock:
+            self._search_cache[cache_key] = search_results
+            self._search_cache.move_to_end(cache_key)
+            if len(self._search_cache) > SEARCH_CACHE_SIZE:
+                self._search_cache.popitem(last=False)
+        
+        return search_results
+    
+    def clear_search_cache(self) -> None:
+        """Drop all cached search results."""
+        with self._search_cache_lock:
+            self._search_cache.clear()
+    
+    @staticmethod
+    def _search_cache_key(
+        query_embedding: np.ndarray,
+        top_k: int,
+        include_documents: bool
+    ) -> bytes:
+        """Hash the query embedding's bytes together with the search options."""
+        digest = hashlib.blake2b(
+            np.asarray(query_embedding, dtype=np.float32).tobytes(),
+            digest_size=16
+        )
+        digest.update(f"{top_k}:{int(include_documents)}".encode())
+        return digest.digest()
     
     def get_count(self) -> int:
         """Get the number of indexed messages."""
@@ -0,0 +1,67 @@
+"""Local message backup used to rebuild the BM25 index when the API is down."""
+
+from pathlib import Path
+from typing import List, Optional
+from datetime import datetime
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
+from app.models.schemas import Message
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+BACKUP_PATH = Path("./data/messages_backup.parquet")
+LEGACY_JSON_BACKUP_PATH = Path("./data/messages_backup.json")
+
+
+def save_messages_backup(messages: List[Message], path: Path = BACKUP_PATH) -> None:
+    """
+    Save messages as Parquet (columnar, native timestamp type).
+    
+    Args:
+        messages: Messages to back up
+        path: Destination file
+    """
+    table = pa.Table.from_pylist([msg.model_dump() for msg in messages])
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pq.write_table(table, path)
+    
+    logger.info("messages_backup_saved", path=str(path), count=len(messages))
+
+
+def load_messages_backup(path: Path = BACKUP_PATH) -> Optional[List[Message]]:
+    """
+    Load messages from the Parquet backup, falling back to the legacy JSON file.
+    
+    Both formats are written by this service, so rows skip Pydantic validation
+    (timestamps come back as datetimes from Parquet and are parsed once for JSON).
+    
+    Args:
+        path: Parquet backup file
+        
+    Returns:
+        List of Message objects, or None if no backup exists
+    """
+    if path.exists():
+        rows = pq.read_table(path).to_pylist()
+        messages = [Message.model_construct(**row) for row in rows]
+        logger.info("messages_backup_loaded", path=str(path), count=len(messages))
+        return messages
+    
+    if LEGACY_JSON_BACKUP_PATH.exists():
+        messages_data = orjson.loads(LEGACY_JSON_BACKUP_PATH.read_bytes())
+        messages = [
+            Message.model_construct(
+                id=m['id'],
+                user_id=m['user_id'],
+                user_name=m['user_name'],
+                timestamp=datetime.fromisoformat(m['timestamp']),
+                message=m['message']
+            )
+            for m in messages_data
+        ]
+        logger.info("legacy_json_backup_loaded", path=str(LEGACY_JSON_BACKUP_PATH), count=len(messages))
+        return messages
+    
+    return None
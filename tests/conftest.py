@@ -1,14 +1,113 @@
 """Pytest configuration and fixtures."""
 
+import os
+from pathlib import Path
+
+# Shared on-disk model cache, so every pytest-xdist worker loads the same
+# files; once the first run has downloaded the model, stay offline
+_MODEL_CACHE = Path(__file__).resolve().parent.parent / "data" / "models" / "fastembed"
+os.environ.setdefault("FASTEMBED_CACHE_PATH", str(_MODEL_CACHE))
+if _MODEL_CACHE.is_dir() and any(_MODEL_CACHE.iterdir()):
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+
 import pytest
+import pytest_asyncio
 from fastapi.testclient import TestClient
 from app.main import app
+from app.services import (
+    get_data_fetcher,
+    get_embedding_service,
+    get_vector_store,
+    get_llm_service,
+)
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def client():
-    """Create a test client for the FastAPI app."""
-    return TestClient(app)
+    """Test client running the app lifespan on one event loop for the whole session."""
+    with TestClient(app) as test_client:
+        # The lifespan may load the embedding model in the background; wait
+        # for it (load_model blocks on the load lock) so tests see it ready
+        get_embedding_service().load_model()
+        yield test_client
+
+
+@pytest.fixture(scope="session")
+def london_search(vector_store, query_embeddings):
+    """Top-5 vector search for "trip to London", shared by the search tests."""
+    return vector_store.search(query_embeddings["trip to London"], top_k=5)
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def data_fetcher():
+    """Data fetcher whose HTTP client lives on the session test loop."""
+    fetcher = get_data_fetcher()
+    yield fetcher
+    await fetcher.aclose()
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def all_messages(data_fetcher):
+    """All member messages, fetched once per test session."""
+    return await data_fetcher.fetch_all_messages()
+
+
+@pytest.fixture(scope="session")
+def embedder():
+    """Embedding service with the model loaded once per test session."""
+    service = get_embedding_service()
+    service.load_model()
+    return service
+
+
+@pytest.fixture(scope="session")
+def query_embeddings(embedder):
+    """Embeddings of the search-test queries, computed in one batch."""
+    queries = ["trip to London", "This is a test message"]
+    return dict(zip(queries, embedder.generate_embeddings_batch(queries)))
+
+
+@pytest.fixture(scope="session")
+def vector_store():
+    """Vector store initialized once per test session."""
+    store = get_vector_store()
+    store.initialize()
+    return store
+
+
+@pytest.fixture(scope="session")
+def llm_service():
+    """LLM service initialized once per test session."""
+    service = get_llm_service()
+    service.initialize()
+    return service
+
+
+class FakeLLMService:
+    """Stand-in for LLMService that answers instantly without calling Groq."""
+    
+    is_initialized = True
+    
+    def initialize(self) -> None:
+        pass
+    
+    def generate_answer(self, question, context_messages):
+        return {
+            'answer': 'stub',
+            'confidence': 'high',
+            'sources': list(dict.fromkeys(msg['user_name'] for msg in context_messages))
+        }
+    
+    async def agenerate_answer(self, question, context_messages):
+        return self.generate_answer(question, context_messages)
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """Route /ask answer generation to FakeLLMService (retrieval stays real)."""
+    fake = FakeLLMService()
+    monkeypatch.setattr("app.api.routes.get_llm_service", lambda: fake)
+    return fake
 
 
 @pytest.fixture
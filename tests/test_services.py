@@ -1,20 +1,24 @@
 """Tests for service layer components."""
 
+from datetime import datetime
 import pytest
+import numpy as np
+from app.models.schemas import Message
 from app.services import (
-    get_data_fetcher,
-    get_embedding_service,
-    get_vector_store,
-    get_llm_service,
+    HybridRetriever,
+    QueryCache,
+    ResponseCache,
+    classify_intent,
+    get_canned_answer,
 )
+from app.services import hybrid_retrieval
 
+_CONFIDENCE_LEVELS = frozenset(("high", "medium", "low"))
 
-@pytest.mark.asyncio
-async def test_data_fetcher_fetch_messages():
+
+def test_data_fetcher_fetch_messages(all_messages):
     """Test fetching messages from the API."""
-    fetcher = get_data_fetcher()
-    
-    messages = await fetcher.fetch_all_messages()
+    messages = all_messages
     
     assert len(messages) > 0
     assert messages[0].id is not None
@@ -25,49 +29,278 @@ async def test_data_fetcher_fetch_messages():
     assert len(messages) > 3000
 
 
-@pytest.mark.asyncio
-async def test_data_fetcher_caching():
+@pytest.mark.asyncio(loop_scope="session")
+async def test_data_fetcher_caching(data_fetcher, monkeypatch):
     """Test that data fetcher uses caching."""
-    fetcher = get_data_fetcher()
+    fetcher = data_fetcher
     
-    # First fetch
-    messages1 = await fetcher.fetch_all_messages()
+    # Count API requests (each one goes through the HTTP client)
+    client_calls = []
+    get_client = fetcher._get_client
     
-    # Second fetch should use cache
-    messages2 = await fetcher.fetch_all_messages()
+    def counting_get_client():
+        client_calls.append(1)
+        return get_client()
+    
+    monkeypatch.setattr(fetcher, "_get_client", counting_get_client)
+    
+    # First fetch goes to the API
+    messages1 = await fetcher.fetch_all_messages(force_refresh=True)
+    assert len(client_calls) == 1
     
-    # Should return same data
-    assert len(messages1) == len(messages2)
-    assert messages1[0].id == messages2[0].id
+    # Second fetch should use cache: same list, no network round-trip
+    messages2 = await fetcher.fetch_all_messages()
+    assert len(client_calls) == 1
+    assert messages2 is messages1
 
 
-def test_embedding_service_load_model():
-    """Test loading the embedding model."""
-    embedder = get_embedding_service()
+@pytest.mark.parametrize("question, intent", [
+    ("hi", "small_talk"),
+    ("Hello there!", "small_talk"),
+    ("ok", "small_talk"),
+    ("Thanks so much!", "small_talk"),
+    ("Good morning", "small_talk"),
+    ("who are you?", "meta"),
+    ("What can you do?", "meta"),
+    ("help", "meta"),
+    ("ok, when is Layla's trip?", "question"),
+    ("hi, when is Layla planning her trip to London?", "question"),
+    ("How many cars does Vikram Desai have?", "question"),
+    ("help me find Amina's restaurants", "question"),
+])
+def test_classify_intent(question, intent):
+    """Test that only whole-question small talk / meta matches skip retrieval."""
+    assert classify_intent(question) == intent
+    
+    # Canned answers exist exactly for the short-circuited intents
+    assert (get_canned_answer(intent) is None) == (intent == "question")
+
+
+def _unit_vector(rng, dim=384):
+    vector = rng.standard_normal(dim).astype(np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def _with_cosine(rng, vector, cosine):
+    """A unit vector at the given cosine similarity to `vector`."""
+    noise = rng.standard_normal(vector.shape[0]).astype(np.float32)
+    noise -= noise.dot(vector) * vector
+    noise /= np.linalg.norm(noise)
+    return cosine * vector + np.sqrt(1 - cosine ** 2) * noise
+
+
+def test_query_cache_exact_hit():
+    """Test the exact (normalized question) tier."""
+    cache = QueryCache(max_entries=10)
+    embedding = _unit_vector(np.random.default_rng(0))
+    results = {'ids': ['1']}
+    
+    assert cache.get("when is layla's trip") is None
+    cache.put("when is layla's trip", embedding, results)
+    
+    cached_embedding, cached_results = cache.get("when is layla's trip")
+    assert cached_results is results
+    assert np.allclose(cached_embedding, embedding)
+    assert cache.hits == 1
+
+
+def test_query_cache_similar_hit_respects_threshold():
+    """Test that near-duplicate embeddings hit only above the similarity threshold."""
+    rng = np.random.default_rng(1)
+    cache = QueryCache(max_entries=10, similarity_threshold=0.97)
+    embedding = _unit_vector(rng)
+    results = {'ids': ['1']}
+    cache.put("q", embedding, results)
+    
+    assert cache.get_similar(_with_cosine(rng, embedding, 0.999)) is results
+    assert cache.get_similar(_with_cosine(rng, embedding, 0.9)) is None
+    assert cache.similar_hits == 1
+    assert cache.misses == 1
+
+
+def test_query_cache_lru_eviction():
+    """Test that the least recently used entry is evicted at capacity."""
+    rng = np.random.default_rng(2)
+    cache = QueryCache(max_entries=2)
+    embeddings = {key: _unit_vector(rng) for key in ("a", "b", "c")}
+    
+    cache.put("a", embeddings["a"], {'ids': ['a']})
+    cache.put("b", embeddings["b"], {'ids': ['b']})
+    cache.get("a")  # Touch: "b" is now least recently used
+    cache.put("c", embeddings["c"], {'ids': ['c']})
+    
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get_similar(embeddings["b"]) is None  # Evicted from the LSH buckets too
+    assert cache.get("a") is not None
+    assert cache.get("c") is not None
+
+
+def test_response_cache_ttl_and_lru():
+    """Test response expiry and LRU eviction."""
+    now = [0.0]
+    cache = ResponseCache(ttl_seconds=60, max_entries=2, clock=lambda: now[0])
+    
+    cache.put("a", "answer a")
+    now[0] = 59.0
+    assert cache.get("a") == "answer a"
+    now[0] = 61.0
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    
+    cache.put("a", "answer a")
+    cache.put("b", "answer b")
+    cache.get("a")
+    cache.put("c", "answer c")
+    assert cache.get("b") is None
+    assert cache.get("a") == "answer a"
+    assert cache.get("c") == "answer c"
+
+
+def test_caches_clear():
+    """Test clear(), as called by /refresh after reindexing."""
+    embedding = _unit_vector(np.random.default_rng(3))
+    query_cache = QueryCache(max_entries=10)
+    response_cache = ResponseCache()
+    query_cache.put("q", embedding, {'ids': ['1']})
+    response_cache.put("q", "answer")
+    
+    query_cache.clear()
+    response_cache.clear()
+    
+    assert len(query_cache) == 0
+    assert query_cache.get("q") is None
+    assert query_cache.get_similar(embedding) is None
+    assert response_cache.get("q") is None
+
+
+_BM25_CORPUS = [
+    ("Layla Kawaguchi", "Planning my trip to London next month."),
+    ("Vikram Desai", "Please book a car for the airport."),
+    ("Layla Kawaguchi", "Can you book a table at a restaurant in London?"),
+    ("Amina Van Den Berg", "I need a car and a hotel in Paris."),
+    ("Vikram Desai", "What is the best restaurant in Paris?"),
+]
+
+# Reference BM25 Okapi scores (k1=1.5, b=0.75, epsilon=0.25) for _BM25_CORPUS,
+# precomputed with rank_bm25.BM25Okapi over "user_name message" tokens
+_BM25_REFERENCE = {
+    "layla london trip": [1.885792, 0.0, 0.629373, 0.0, 0.0],
+    # "a" and "in" occur in most documents: their idf is floored at epsilon * mean idf
+    "book a car in paris": [0.0, 0.931145, 0.77811, 1.053119, 0.572976],
+    "restaurant": [0.0, 0.0, 0.314686, 0.0, 0.358169],
+    "zzz": [0.0, 0.0, 0.0, 0.0, 0.0],
+}
+
+
+def _bm25_retriever(monkeypatch, cache_dir=""):
+    """Index _BM25_CORPUS in a fresh retriever (index persistence off unless cache_dir is set)."""
+    retriever = HybridRetriever()
+    monkeypatch.setattr(retriever.settings, "bm25_cache_dir", cache_dir)
+    retriever.index_messages([
+        Message(id=str(i), user_id=f"user-{i}", user_name=name,
+                timestamp=datetime(2024, 1, 1), message=text)
+        for i, (name, text) in enumerate(_BM25_CORPUS, start=1)
+    ])
+    return retriever
+
+
+def _assert_reference_scores(retriever):
+    for query, expected in _BM25_REFERENCE.items():
+        scores = retriever._bm25_scores(retriever._tokenize(query))
+        assert np.allclose(scores, expected, rtol=1e-4, atol=1e-5), query
+
+
+def test_bm25_scores_scipy(monkeypatch):
+    """Test the scipy column-product path against reference BM25 scores."""
+    monkeypatch.setattr(hybrid_retrieval, "_bm25_scan", None)
+    _assert_reference_scores(_bm25_retriever(monkeypatch))
+
+
+def test_bm25_scores_numba(monkeypatch):
+    """Test the compiled scan path against reference BM25 scores."""
+    pytest.importorskip("numba")
+    assert hybrid_retrieval._bm25_scan is not None
+    _assert_reference_scores(_bm25_retriever(monkeypatch))
+
+
+def test_bm25_batch_matches_single(monkeypatch):
+    """Test that batched BM25 search returns the same results as one query at a time."""
+    retriever = _bm25_retriever(monkeypatch)
+    queries = list(_BM25_REFERENCE)
+    
+    batch = retriever.search_bm25_batch(queries, top_k=3)
+    single = [retriever.search_bm25(query, top_k=3) for query in queries]
+    
+    assert [[r['id'] for r in results] for results in batch] == [[r['id'] for r in results] for results in single]
+    for batch_results, single_results in zip(batch, single):
+        assert np.allclose(
+            [r['bm25_score'] for r in batch_results],
+            [r['bm25_score'] for r in single_results],
+            rtol=1e-5
+        )
+    assert retriever.search_bm25_batch([]) == []
+
+
+def test_fuse_rrf_carries_scores(monkeypatch):
+    """Test that RRF fusion reports both the dense and BM25 scores of each hit."""
+    retriever = _bm25_retriever(monkeypatch)
+    bm25_ids, bm25_scores = retriever.search_bm25_topk("restaurant", use_expansion=False)
+    semantic_results = [
+        {'id': '1', 'document': 'd', 'user_name': 'u', 'timestamp': 't', 'distance': 0.25},
+        {'id': '5', 'document': 'd', 'user_name': 'u', 'timestamp': 't', 'distance': 1.0},
+    ]
     
-    embedder.load_model()
+    fused = {r['id']: r for r in retriever.fuse_rrf(semantic_results, bm25_ids, bm25_scores)}
     
+    assert set(fused) == {'1', '3', '5'}
+    assert fused['1']['semantic_score'] == pytest.approx(0.8)
+    assert fused['1']['bm25_score'] == 0.0
+    assert fused['5']['semantic_score'] == pytest.approx(0.5)
+    assert fused['5']['bm25_score'] == pytest.approx(0.358169, rel=1e-4)
+    assert fused['3']['semantic_score'] == 0.0  # BM25-only hit
+    assert fused['3']['bm25_score'] == pytest.approx(0.314686, rel=1e-4)
+
+
+def test_bm25_index_round_trip(monkeypatch, tmp_path):
+    """Test that a persisted BM25 index loads back with identical scores."""
+    built = _bm25_retriever(monkeypatch, cache_dir=str(tmp_path))
+    assert len(list(tmp_path.glob("bm25_index_*.npz"))) == 1
+    
+    loaded = HybridRetriever()
+    loaded._ids = built._ids
+    assert loaded._load_index(built._index_cache_path(built._messages))
+    assert loaded._vocab == built._vocab
+    assert (loaded._bm25_matrix != built._bm25_matrix).nnz == 0
+    _assert_reference_scores(loaded)
+
+
+def test_embedding_service_load_model(embedder):
+    """Test loading the embedding model."""
     assert embedder.is_loaded
 
 
-def test_embedding_service_generate_embedding():
+def test_embedding_service_generate_embedding(embedder):
     """Test generating a single embedding."""
-    embedder = get_embedding_service()
-    embedder.load_model()
+    text = "This is a test message"
+    embedding = embedder.generate_embedding(text)
     
+    assert isinstance(embedding, np.ndarray)
+    assert embedding.shape == (384,)  # Dimension of all-MiniLM-L6-v2
+    assert embedding.dtype == np.float32
+    assert np.isfinite(embedding).all()
+
+
+def test_embedding_service_generate_embedding_smoke(embedder, query_embeddings):
+    """Test that a direct single-text call matches the batched query embedding."""
     text = "This is a test message"
     embedding = embedder.generate_embedding(text)
     
-    assert isinstance(embedding, list)
-    assert len(embedding) == 384  # Dimension of all-MiniLM-L6-v2
-    assert all(isinstance(x, float) for x in embedding)
+    assert np.allclose(embedding, query_embeddings[text], atol=1e-5)
 
 
-def test_embedding_service_batch_generation():
+def test_embedding_service_batch_generation(embedder):
     """Test generating embeddings in batch."""
-    embedder = get_embedding_service()
-    embedder.load_model()
-    
     texts = [
         "First message",
         "Second message",
@@ -76,34 +309,58 @@ def test_embedding_service_batch_generation():
     
     embeddings = embedder.generate_embeddings_batch(texts)
     
-    assert len(embeddings) == 3
-    assert all(len(emb) == 384 for emb in embeddings)
+    arr = np.stack([np.asarray(emb, dtype=np.float32) for emb in embeddings])
+    assert arr.shape == (3, 384)
+    assert np.isfinite(arr).all()
 
 
-def test_vector_store_initialization():
-    """Test vector store initialization."""
-    vector_store = get_vector_store()
+def test_embedding_service_batch_packing(embedder, monkeypatch):
+    """Test token-budget batching keeps batches in budget and rows in input order."""
+    texts = [f"message number {i} " + "word " * (i % 7) for i in range(20)]
+    lengths = {text: 4 + (i * 5) % 13 for i, text in enumerate(texts)}
+    budget = 48
+    monkeypatch.setattr(embedder.settings, "embedding_max_tokens_per_batch", budget)
+    monkeypatch.setattr(embedder, "_token_lengths", lambda batch: [lengths[text] for text in batch])
+    
+    batches = []
+    embed_batch = embedder._embed_batch
+    
+    def recording_embed_batch(batch):
+        batches.append(batch)
+        return embed_batch(batch)
     
-    vector_store.initialize()
+    monkeypatch.setattr(embedder, "_embed_batch", recording_embed_batch)
     
+    embeddings = embedder.generate_embeddings_batch(texts)
+    
+    assert len(batches) > 1
+    assert sorted(text for batch in batches for text in batch) == sorted(texts)
+    for batch in batches:
+        assert len(batch) * max(lengths[text] for text in batch) <= budget
+    
+    expected = np.stack([embedder.generate_embedding(text) for text in texts])
+    assert embeddings.shape == expected.shape
+    assert np.allclose(embeddings, expected, atol=1e-4)
+
+
+def test_embedding_service_batch_empty(embedder):
+    """Test that an empty batch keeps the embedding dimension."""
+    embeddings = embedder.generate_embeddings_batch([])
+    
+    assert embeddings.shape == (0, 384)
+    assert embeddings.dtype == np.float32
+
+
+def test_vector_store_initialization(vector_store):
+    """Test vector store initialization."""
     assert vector_store.is_initialized
     assert vector_store.get_count() >= 0
 
 
-def test_vector_store_search():
+def test_vector_store_search(london_search):
     """Test vector store search functionality."""
-    embedder = get_embedding_service()
-    embedder.load_model()
-    
-    vector_store = get_vector_store()
-    vector_store.initialize()
-    
-    # Generate query embedding
-    query = "planning a trip to London"
-    query_embedding = embedder.generate_embedding(query)
-    
-    # Search
-    results = vector_store.search(query_embedding, top_k=5)
+    # Search (run once per session in the fixture)
+    results = london_search
     
     assert 'documents' in results
     assert 'metadatas' in results
@@ -112,23 +369,17 @@ def test_vector_store_search():
     if len(results['documents']) > 0:
         # Check result structure
         assert len(results['documents']) <= 5
-        assert all(isinstance(doc, str) for doc in results['documents'])
+        assert all(type(doc) is str for doc in results['documents'])
 
 
-def test_llm_service_initialization():
+def test_llm_service_initialization(llm_service):
     """Test LLM service initialization."""
-    llm_service = get_llm_service()
-    
-    llm_service.initialize()
-    
     assert llm_service.is_initialized
 
 
-def test_llm_service_answer_generation():
+@pytest.mark.slow
+def test_llm_service_answer_generation(llm_service):
     """Test LLM answer generation."""
-    llm_service = get_llm_service()
-    llm_service.initialize()
-    
     question = "What is mentioned in these messages?"
     context_messages = [
         {
@@ -152,49 +403,40 @@ def test_llm_service_answer_generation():
     assert 'sources' in result
     
     assert len(result['answer']) > 0
-    assert result['confidence'] in ['high', 'medium', 'low']
+    assert result['confidence'] in _CONFIDENCE_LEVELS
     assert len(result['sources']) > 0
 
 
-@pytest.mark.asyncio
-async def test_end_to_end_pipeline():
+@pytest.mark.slow
+def test_end_to_end_pipeline(all_messages, embedder, llm_service, query_embeddings, london_search):
     """Test the complete pipeline from fetching to answering."""
-    # Fetch data
-    fetcher = get_data_fetcher()
-    messages = await fetcher.fetch_all_messages()
-    assert len(messages) > 0
+    # Fetched data (once per session)
+    assert len(all_messages) > 0
     
-    # Load embedder
-    embedder = get_embedding_service()
-    embedder.load_model()
     assert embedder.is_loaded
     
-    # Generate query embedding
+    # Query embedding (batched in the session fixture)
     query = "trip to London"
-    query_embedding = embedder.generate_embedding(query)
+    query_embedding = query_embeddings[query]
     assert len(query_embedding) == 384
     
-    # Search vector store
-    vector_store = get_vector_store()
-    vector_store.initialize()
-    results = vector_store.search(query_embedding, top_k=5)
+    # Search vector store (shared session search for this query)
+    results = london_search
     assert len(results['documents']) > 0
     
-    # Generate answer
-    llm_service = get_llm_service()
-    llm_service.initialize()
-    
+    # Generate answer (from at most top_k results)
+    top_k = 5
     context_messages = [
         {
             'document': doc,
             'user_name': meta['user_name'],
             'timestamp': meta['timestamp'],
-            'distance': dist
+            'distance': float(dist)
         }
         for doc, meta, dist in zip(
-            results['documents'],
-            results['metadatas'],
-            results['distances']
+            results['documents'][:top_k],
+            results['metadatas'][:top_k],
+            results['distances'][:top_k]
         )
     ]
     